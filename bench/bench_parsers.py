@@ -0,0 +1,145 @@
+"""
+Parser backend benchmark: html.parser vs lxml, whole page vs scoped to the
+result cards. Pages are synthetic but follow each board's card markup.
+
+    python bench/bench_parsers.py [--cards 50] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main  # noqa: E402
+
+TITLES = [
+    "Clinical Fellow in Emergency Medicine", "Specialty Doctor - General Surgery",
+    "Trust Grade Doctor (FY2 level) Acute Medicine", "Staff Nurse - Cardiology Ward",
+    "Registrar in Paediatrics", "Senior Clinical Fellow Anaesthetics", "Band 3 Ward Clerk",
+]
+
+def _chrome(body: str) -> str:
+    nav = "".join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(80))
+    script = "<script>" + "var x = {a: 1, b: [1,2,3]};\n" * 1500 + "</script>"
+    footer = "".join(f'<p class="footer-link"><a href="/about/{i}">About {i}</a></p>' for i in range(60))
+    return (f"<!DOCTYPE html><html><head><title>Jobs</title>{script}</head><body>"
+            f"<header><nav><ul>{nav}</ul></nav></header><main>{body}</main>"
+            f"<footer>{footer}</footer></body></html>")
+
+def page_nhsjobs(n: int) -> str:
+    cards = "".join(f"""
+<li data-test="search-result" class="nhsuk-list-panel">
+  <h2><a data-test="search-result-job-title" href="/candidate/jobadvert/C9{100000 + i}">{TITLES[i % len(TITLES)]}</a></h2>
+  <div data-test="search-result-location"><h3>Some NHS Foundation Trust
+    <div class="location-font-size">Leeds, LS1 3EX</div></h3></div>
+  <ul>
+    <li data-test="search-result-salary">Salary: <strong>£49,909 to £61,825 a year</strong></li>
+    <li data-test="search-result-closingDate">Closing date: <strong>14 November 2025</strong></li>
+    <li data-test="search-result-jobType">Contract: <strong>Fixed term</strong></li>
+    <li data-test="search-result-publicationDate">Date posted: <strong>10 November 2025</strong></li>
+  </ul>
+</li>""" for i in range(n))
+    return _chrome(f'<ul class="nhsuk-list search-results">{cards}</ul>')
+
+def page_healthjobsuk(n: int) -> str:
+    cards = "".join(f"""
+<li class="hj-job">
+  <a href="/job/UK/Yorkshire/Leeds/Trust/Dept/Job-v{7000000 + i}" title="{TITLES[i % len(TITLES)]}">
+    <div class="hj-jobtitle">{TITLES[i % len(TITLES)]}</div>
+    <div class="hj-grade">Specialty Registrar</div>
+    <div class="hj-employername">Leeds Teaching Hospitals</div>
+    <div class="hj-locationtown">Leeds</div>
+    <div class="hj-primaryspeciality">General Medicine</div>
+    <div class="hj-salary">£55,329 - £63,152</div>
+  </a>
+</li>""" for i in range(n))
+    return _chrome(f'<ul class="hj-joblist">{cards}</ul>')
+
+def page_hscni(n: int) -> str:
+    cards = "".join(f"""
+<article class="job-result">
+  <h2><a href="/Job/{90000 + i}/clinical-fellow">{TITLES[i % len(TITLES)]}</a></h2>
+  <div class="job-ref">Ref: {90000 + i}</div>
+  <ul class="job-overview">
+    <li><strong>Salary:</strong> £40,000</li>
+    <li><strong>Location:</strong> Belfast</li>
+    <li><strong>Contract type:</strong> Permanent</li>
+  </ul>
+  <div class="job-closing"><strong>Closing date:</strong> Friday 14th November 2025</div>
+</article>""" for i in range(n))
+    return _chrome(f'<section class="results">{cards}</section>')
+
+def page_scotland(n: int) -> str:
+    cards = "".join(f"""
+<div class="card"><div class="card-body">
+  <h3><a href="/Home/JobDetail?JobId={200000 + i}">{TITLES[i % len(TITLES)]}</a></h3>
+  <p class="jobreference"><strong>Reference:</strong> REF{i}</p>
+  <p class="salary"><strong>Salary:</strong> £50,000</p>
+  <p class="closingdate"><strong>Closing date:</strong> 14/11/2025</p>
+  <p class="department"><strong>Job family:</strong> Medical and Dental</p>
+  <p class="location"><strong>Location:</strong> Glasgow</p>
+  <p class="employmenttype"><strong>Employment type:</strong> Fixed Term</p>
+  <p class="hours"><strong>Hours:</strong> 40</p>
+  <p class="school"><strong>Board:</strong> NHS Greater Glasgow</p>
+  <p class="shift"><strong>Department:</strong> Acute</p>
+</div></div>""" for i in range(n))
+    return _chrome(f'<div class="results">{cards}</div>')
+
+def page_generic(n: int) -> str:
+    cards = "".join(f'<div><a href="/jobs/{i}">{TITLES[i % len(TITLES)]}</a></div>' for i in range(n))
+    return _chrome(cards)
+
+SITES = {
+    "nhsjobs":     (main.parse_nhsjobs, page_nhsjobs),
+    "healthjobsuk": (main.parse_healthjobsuk, page_healthjobsuk),
+    "hscni":       (main.parse_hscni, page_hscni),
+    "scotland":    (main.parse_scotland, page_scotland),
+    "generic":     (main.parse_generic, page_generic),
+}
+
+def _modes():
+    modes = [("html.parser", False), ("html.parser", True)]
+    try:
+        import lxml  # noqa: F401
+        modes += [("lxml", False), ("lxml", True)]
+    except ImportError:
+        print("(lxml not installed — skipping lxml modes)")
+    return modes
+
+def run(cards: int, repeat: int):
+    base = "https://example.org"
+    print(f"{'site':<13}{'backend':<13}{'scope':<8}{'ms/page':>9}{'peak KiB':>10}{'speedup':>9}")
+    for site, (parser, build) in SITES.items():
+        html = build(cards)
+        reference = None
+        baseline_ms = None
+        for backend, scoped in _modes():
+            jobs = parser(main.make_soup(html, parser, backend=backend, scoped=scoped), base)
+            if reference is None:
+                reference = jobs
+            elif jobs != reference:
+                print(f"!! {site} {backend} scoped={scoped}: output differs from html.parser/full")
+
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                parser(main.make_soup(html, parser, backend=backend, scoped=scoped), base)
+                times.append(time.perf_counter() - t0)
+            ms = min(times) * 1000   # best-of-N: least disturbed by other load
+
+            tracemalloc.start()
+            parser(main.make_soup(html, parser, backend=backend, scoped=scoped), base)
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+
+            baseline_ms = baseline_ms or ms
+            scope = "cards" if scoped else "page"
+            print(f"{site:<13}{backend:<13}{scope:<8}{ms:>9.2f}{peak:>10.0f}{baseline_ms / ms:>8.1f}x")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--cards", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+    run(args.cards, args.repeat)
@@ -0,0 +1,179 @@
+"""
+Offline benchmark suite: site parsers over synthetic listing pages, the
+relevant_for_* filters, format_message and _html_to_whop_md, with
+throughput, allocations and a comparison against a stored baseline.
+
+    python bench/bench_suite.py                   # run, compare with bench/baseline.json
+    python bench/bench_suite.py --save-baseline   # run and store the result as the new baseline
+
+Listing pages are built in memory by bench_parsers; a real page saved as
+bench/fixtures/<name>.html (not committed) is used instead when present.
+
+Timings are compared relative to a fixed calibration workload timed in the
+same run, so a baseline taken on one machine (or a busy moment) still means
+something on another. Exits non-zero when a case is slower than the baseline
+by more than --tolerance (default 25%), or allocates that much more.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+import main  # noqa: E402
+from bench_parsers import (page_generic, page_healthjobsuk, page_hscni,  # noqa: E402
+                           page_nhsjobs, page_scotland)
+
+FIXTURES_DIR  = os.path.join(HERE, "fixtures")
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+
+# fixture → (parser, page builder, cards). Card counts follow each board's
+# default page size.
+FIXTURES = {
+    "nhsjobs":      (main.parse_nhsjobs,      page_nhsjobs,      20),
+    "healthjobsuk": (main.parse_healthjobsuk, page_healthjobsuk, 50),
+    "hscni":        (main.parse_hscni,        page_hscni,        25),
+    "scotland":     (main.parse_scotland,     page_scotland,     20),
+    "generic":      (main.parse_generic,      page_generic,      100),
+}
+
+# A spread of real-world advert titles: matches for every route plus the
+# excluded grades and non-medical roles that make up most of a listing.
+TITLES = [
+    "Clinical Fellow in Emergency Medicine", "Specialty Doctor - General Surgery",
+    "Trust Grade Doctor (FY2 level) Acute Medicine", "Staff Nurse - Cardiology Ward",
+    "Registrar in Paediatrics", "Senior Clinical Fellow Anaesthetics", "Band 3 Ward Clerk",
+    "Consultant Cardiologist", "Junior Clinical Fellow - Trauma & Orthopaedics",
+    "Locum Appointment for Service (LAS) Specialty Registrar ST3+ Obstetrics & Gynaecology",
+    "Foundation Year 1 Doctor", "Clinical Fellow ST1-2 Level in Psychiatry",
+    "Physician Associate - Acute Medical Unit", "Healthcare Support Worker",
+    "Specialty Doctor in Old Age Psychiatry", "Senior House Officer - ENT",
+    "Clinical Research Fellow - Oncology", "Advanced Clinical Practitioner",
+    "Teaching Fellow in Surgery", "Non-Training Registrar in Urology",
+    "Speciality Doctor Haematology", "Pharmacy Technician", "Trust Doctor Neonatology",
+    "Clinical Fellow in Intensive Care Medicine (ST3+)", "Medical Secretary",
+]
+
+def fixture_path(name: str) -> str:
+    return os.path.join(FIXTURES_DIR, f"{name}.html")
+
+def load_fixture(name: str) -> str:
+    try:
+        with open(fixture_path(name), encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        _, build, cards = FIXTURES[name]
+        return build(cards)
+
+def measure(fn, repeat: int) -> dict:
+    """Best-of-N wall time per call, plus tracemalloc peak and block count for one call."""
+    fn()   # warm caches and lazy imports before timing
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    fn()
+    after = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    blocks = sum(s.count_diff for s in after.compare_to(before, "filename") if s.count_diff > 0)
+    return {"ms": min(times) * 1000, "peak_kib": peak / 1024, "blocks": blocks}
+
+def calibrate(repeat: int) -> float:
+    """Best-of-N ms for a fixed pure-Python workload (string, dict and regex churn)."""
+    def work():
+        d = {}
+        for i in range(20000):
+            k = f"job-{i % 997}"
+            d[k] = d.get(k, 0) + len(k.upper())
+        return main.re.findall(r"\d+", " ".join(d))
+    return measure(work, repeat)["ms"]
+
+def cases() -> dict:
+    """name → (callable, items processed per call) for every benchmarked operation."""
+    base = "https://example.org"
+    out = {}
+    jobs = []
+    for name, (parser, _, _) in FIXTURES.items():
+        html = load_fixture(name)
+        parsed = parser(main.make_soup(html, parser), base)
+        out[f"parse/{name}"] = (lambda p=parser, h=html: p(main.make_soup(h, p), base), len(parsed))
+        jobs += parsed
+
+    titles = TITLES * 20
+    channels = main.SPECIALTY_CHANNELS
+    out["filter/relevant_for_chat"]  = (lambda: [main.relevant_for_chat(t) for t in titles], len(titles))
+    out["filter/relevant_for_early"] = (lambda: [main.relevant_for_early(t) for t in titles], len(titles))
+    out["filter/relevant_for_specialty"] = (
+        lambda: [main.relevant_for_specialty(t, ch) for t in titles for ch in channels],
+        len(titles) * len(channels))
+    out["filter/route_job"] = (lambda: [main.route_job(t) for t in titles], len(titles))
+
+    msgs = [main.format_message(j) for j in jobs]
+    out["format/format_message"]  = (lambda: [main.format_message(j) for j in jobs], len(jobs))
+    out["format/_html_to_whop_md"] = (lambda: [main._html_to_whop_md(m) for m in msgs], len(msgs))
+    return out
+
+def run(repeat: int) -> dict:
+    results = {"_calibration_ms": calibrate(repeat)}
+    for name, (fn, items) in cases().items():
+        r = measure(fn, repeat)
+        r["items"] = items
+        r["per_sec"] = items / (r["ms"] / 1000) if r["ms"] else 0.0
+        results[name] = r
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    scale = baseline.get("_calibration_ms", 0) / results["_calibration_ms"] if baseline else 1.0
+    print(f"{'case':<32}{'items':>6}{'ms':>9}{'items/s':>11}{'peak KiB':>10}{'blocks':>8}{'vs base':>9}")
+    for name, r in results.items():
+        if name.startswith("_"):
+            continue
+        base = baseline.get(name)
+        delta = ""
+        if base:
+            ratio = r["ms"] * scale / base["ms"] if base["ms"] and scale else 1.0
+            delta = f"{(ratio - 1) * 100:+.0f}%"
+            if ratio > 1 + tolerance:
+                regressions.append(f"{name}: {base['ms']:.2f} → {r['ms']:.2f} ms")
+            if base["peak_kib"] and r["peak_kib"] > base["peak_kib"] * (1 + tolerance):
+                regressions.append(f"{name}: peak {base['peak_kib']:.0f} → {r['peak_kib']:.0f} KiB")
+        print(f"{name:<32}{r['items']:>6}{r['ms']:>9.2f}{r['per_sec']:>11.0f}"
+              f"{r['peak_kib']:>10.0f}{r['blocks']:>8}{delta:>9}")
+    return regressions
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--save-baseline", action="store_true")
+    args = ap.parse_args()
+
+    results = run(args.repeat)
+    try:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline saved to {BASELINE_PATH}")
+    elif regressions:
+        print("\nREGRESSIONS:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    elif not baseline:
+        print("\n(no baseline yet — run with --save-baseline)")
@@ -2,13 +2,31 @@ import asyncio
 import random
 import re
 import aiohttp
+import bisect
 import gc
+import hashlib
+import itertools
+import json
+import math
 import os
 import resource
+import socket
+import signal
+import sqlite3
+import time
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright, TimeoutError as PWTimeout
-from playwright_stealth import stealth_async
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from aiohttp import web
+from bs4 import BeautifulSoup, SoupStrainer
+try:
+    from playwright.async_api import async_playwright, TimeoutError as PWTimeout
+    from playwright_stealth import stealth_async
+except ImportError:   # --replay needs no browser
+    async_playwright = stealth_async = None
+    class PWTimeout(Exception):
+        pass
 from fake_useragent import UserAgent
 
 # ================= CONFIG ================= #
@@ -20,399 +38,71 @@ EARLY_DELAY   = 300                 # seconds before group/Whop receive alert
 WHOP_API_KEY    = "apik_ud2gxqVNMTONA_A2052134_C_9990092af1338a1becd245e112caaac179d91e2e6bbf23cbb0e176ab43765a"
 WHOP_CHANNEL_ID = "chat_feed_1CbW9WpgbzoeU9E9KQ5WpT"  # Job Alerts Chat (main)
 
+# Overridable so --replay (or a staging run) can point delivery at a stand-in server
+TELEGRAM_API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org")
+WHOP_API_BASE     = os.environ.get("WHOP_API_BASE", "https://api.whop.com")
+
 CHECK_INTERVAL       = 120
 PAGE_TIMEOUT         = 20_000
 DETAIL_TIMEOUT       = 15_000
 SITE_HARD_LIMIT      = 300
-TELEGRAM_SEND_INTERVAL = 1.1
 MAX_CONCURRENT_CONTEXTS = 3
-PLAYWRIGHT_RECYCLE_EVERY = 120
+PLAYWRIGHT_RECYCLE_EVERY = 120   # cycles; the watchdog may recycle sooner (see BrowserWatchdog)
+HTTP_TIMEOUT         = 15
+MAX_CONCURRENT_HTTP  = 6
+MAX_CONCURRENT_SCRAPES = 6  # global budget for the adaptive scheduler (HTTP + browser)
+POLL_MIN_INTERVAL    = 45
+POLL_MAX_INTERVAL    = 600
+SCHEDULER            = os.environ.get("SCHEDULER", "adaptive")   # "adaptive" | "fixed" (cycle + sleep)
+CONTEXT_MAX_USES     = 25   # pooled context is rotated (new UA/viewport) after this many scrapes
+CONTEXT_POOL_IDLE    = 1    # warm contexts kept per site
+BROWSER_RSS_LIMIT_MB = int(os.environ.get("BROWSER_RSS_LIMIT_MB", "1500"))  # Playwright driver + Chromium tree
+PYTHON_RSS_LIMIT_MB  = int(os.environ.get("PYTHON_RSS_LIMIT_MB", "800"))
+BROWSER_MAX_PAGES    = 40   # open pages across all contexts; more means leases are leaking
+WATCHDOG_INTERVAL    = 15   # seconds between memory samples
+
+# Send rate limits as (messages per second, burst). Telegram allows about one
+# message a second per chat, 20 a minute in a group and ~30/s per bot overall;
+# Whop publishes no figures, so its limits are conservative and back off on 429.
+TG_CHAT_RATE      = (1.0, 3)
+TG_GROUP_RATE     = (20 / 60, 3)
+EARLY_CHAT_RATE   = (20 / 60, 3)   # EARLY_CHAT_ID is a supergroup; set here rather than guessed from the ID
+TG_GLOBAL_RATE    = (25.0, 25)
+WHOP_CHANNEL_RATE = (1.0, 3)
+WHOP_GLOBAL_RATE  = (5.0, 5)
+
+# Prometheus text-format metrics on http://METRICS_HOST:METRICS_PORT/metrics (0 = off)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+
+# "lxml" (C, much faster) when installed, else the stdlib "html.parser"
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = os.environ.get("HTML_PARSER", "lxml")
+except ImportError:
+    HTML_PARSER = os.environ.get("HTML_PARSER", "html.parser")
+# Parse only the result cards (SoupStrainer). bench/bench_parsers.py shows this
+# pays off with html.parser but not reliably with lxml, so it is off there
+PARSE_SCOPED = os.environ.get("PARSE_SCOPED", "1" if HTML_PARSER == "html.parser" else "0") != "0"
+# "browser": pull job records out with page.evaluate; "python": page.content() + parse_*
+EXTRACT_MODE = os.environ.get("EXTRACT_MODE", "browser")
+
+# Server-rendered listings: fetched over plain HTTP, browser only as fallback
+HTTP_FETCH_SITES = ["healthjobsuk.com", "hscni.net", "jobs.scot.nhs.uk"]
 
 ua = UserAgent()
 
-# ================= MAIN BROAD URLs (existing) ================= #
-URLS = [
-    "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=411&_srt=startdate&_sd=a",
-    "https://www.healthjobsuk.com/job_list?JobSearch_Submit=Search&_srt=publicationdate&_sd=desc",
-    "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=534&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=64082&_srt=startdate&_sd=d",
-    "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=737&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=81534&_srt=startdate&_sd=a",
-    "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=594&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=88730&_srt=startdate&_sd=a",
-    "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=572&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=97667&_srt=startdate&_sd=a",
-    "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=558&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=110250&_srt=startdate&_sd=a",
-    "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=581&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=44291&_srt=startdate&_sd=a",
-    "https://www.jobs.nhs.uk/candidate/search/results?staffGroup=MEDICAL_AND_DENTAL&payRange=40-50%2C50-60%2C60-70&searchFormType=sortBy&sort=publicationDateDesc&language=en",
-    "https://jobs.hscni.net/Search?keyword=&SearchCatID=63&SearchOrgID=0&SearchBandID=0&Order=Added",
-    "https://apply.jobs.scot.nhs.uk/Home/Job",
-]
-
-# ================= MAIN BROAD FILTERS (Telegram only) ================= #
-CHAT_SPECIALTIES = [
-    "medicine", "acute", "internal", "general", "surgery", "general surgery",
-    "trauma", "orthopaedic", "plastic", "emergency", "cardiology", "respiratory",
-    "gastro", "neurology", "paediatric", "haematology", "intensive care",
-    "critical care", "icu", "vascular", "urology", "obstetrics", "gynaecology",
-    "gynecology", "anesthesia",
-    "neurosurgery", "pediatric surgery",
-    "gim", "amau", "amu", "pulmonology", "gastroenterology", "endocrinology",
-    "diabetes", "renal", "nephrology", "rheumatology", "oncology", "dermatology",
-    "infectious diseases", "rehabilitation medicine", "geriatric", "care of the elderly",
-    "hdu", "dependency", "anaesthetic", "anaesthetics", "palliative",
-    "gynae", "obs", "maternity",
-    "resus", "pemed", "ed",
-    "ophthalmology", "vitreoretinal", "eyes", "eye clinic",
-    "ent", "otolaryngology", "head and neck surgery",
-]
-CHAT_EXCLUDE_KEYWORDS = [
-    "consultant", "nurse", "midwife", "assistant", "manager", "director", "admin",
-    "physiotherapist", "radiographer", "lead", "scientist", "receptionist",
-    "housekeeper", "cook", "clerk", "practitioner", "nutritionist", "nutrition",
-    "coordinator", "therapist", "secretary", "pharmacist", "matron", "worker",
-    "pharmacy", "chief", "counseling", "principal",
-    # admin, clerical & office
-    "ward clerk", "health records", "medical records", "clinical coder",
-    "coding officer", "personal assistant", "pals officer", "mdt coordinator",
-    "practice manager", "voluntary services", "call handler", "call taker",
-    # finance
-    "finance officer", "finance analyst", "finance assistant", "finance manager",
-    "accountant", "procurement", "commissioning manager", "payroll",
-    # human resources
-    "hr assistant", "hr advisor", "hr manager", "hr administrator",
-    "workforce advisor", "resourcing", "recruitment advisor",
-    "learning and development", "organisational development",
-    # IT & informatics
-    "it support", "im&t analyst", "information analyst", "systems analyst",
-    "network manager", "data analyst", "informatics", "digital", "programmer",
-    "developer", "cybersecurity", "helpdesk",
-    # communications & PR
-    "communications officer", "pr executive", "media officer", "graphic designer",
-    "complaints officer", "engagement officer",
-    # estates & facilities
-    "porter", "domestic", "cleaner", "catering", "laundry", "facilities manager",
-    "estates manager", "estates officer", "maintenance engineer", "electrician",
-    "plumber", "gardener", "security officer", "driver", "transport",
-    "fm assistant", "switchboard", "sterile services", "decontamination",
-    # nursing & midwifery
-    "healthcare assistant", "healthcare support worker", "nursing associate",
-    "ward sister", "charge nurse", "staff nurse", "district nurse", "health visitor",
-    "school nurse", "community nurse", "maternity support worker",
-    # allied health professions
-    "occupational therapist", "dietitian", "podiatrist",
-    "speech and language therapist", "orthoptist", "optometrist", "paramedic",
-    "ambulance practitioner", "prosthetist", "orthotist",
-    "operating department practitioner", "odp", "art therapist", "music therapist",
-    "dramatherapist", "play specialist", "sexual health adviser",
-    # healthcare science & laboratory
-    "biomedical scientist", "clinical scientist", "phlebotomist",
-    "healthcare scientist", "medical physicist", "clinical physiologist",
-    "cardiac physiologist", "respiratory physiologist", "cytology screener",
-    "pathology technician", "mortuary technician", "genetic counsellor", "audiologist",
-    "medical engineering technician", "laboratory assistant", "technician",
-    "physiologist",
-    # pharmacy
-    "pharmacy technician", "pharmacy support worker", "dispensing assistant",
-    "medicines management",
-    # psychology, mental health & chaplaincy
-    "psychologist", "psychotherapist", "psychological wellbeing practitioner",
-    "mental health worker", "chaplain", "pastoral", "welfare officer",
-    # dental
-    "dentist", "dental", "dental technician", "dental nurse", "dental therapist",
-    "oral health practitioner", "dental hygienist", "orthodontic therapist",
-    # management & leadership
-    "head of service", "operations manager", "general manager", "service manager",
-    "improvement manager", "programme manager", "project manager", "project officer",
-    # library & information
-    "librarian", "library technician", "knowledge officer",
-    # public health & health improvement
-    "public health practitioner", "health improvement practitioner",
-    "health promotion officer", "screening practitioner", "public health researcher",
-    "clinical governance", "quality improvement", "clinical audit",
-    # medical associate professions
-    "physician associate", "surgical care practitioner",
-    "advanced clinical practitioner", "advanced nurse practitioner",
-    "advanced practitioner", "anaesthesia associate",
-    # misc
-    "gp", "sister", "maxillofacial", "clerical", "oral", "hca", "failsafe", "orthopedic", "store person",
-]
-
-EARLY_SPECIALTIES = [
-    "medicine", "acute", "internal", "general", "surgery", "general surgery",
-    "trauma", "orthopaedic", "plastic", "emergency", "cardiology", "respiratory",
-    "gastro", "neurology", "paediatric", "haematology", "intensive care",
-    "critical care", "icu", "vascular", "urology", "rheumatology",
-]
-EARLY_GRADE_KEYWORDS = [
-    "fy1", "fy2", "foundation", "ct1", "ct2", "ct3", "st1", "st2", "st3",
-    "registrar", "trust", "doctor", "grade", "clinical", "fellow", "specialty",
-    "junior", "locum", "teaching",
-]
-EARLY_EXCLUDE_KEYWORDS = [
-    "consultant", "st4", "st5", "st6", "st7", "cct", "nurse", "midwife",
-    "assistant", "manager", "director", "admin", "physiotherapist", "radiographer",
-    "lead", "scientist", "receptionist", "housekeeper", "cook", "clerk",
-    "practitioner", "nutritionist", "nutrition", "coordinator", "therapist",
-    "secretary", "pharmacist", "matron", "worker", "pharmacy", "chief",
-    "psychiatry", "maxillofacial", "counseling", "principal",
-    # admin, clerical & office
-    "ward clerk", "health records", "medical records", "clinical coder",
-    "coding officer", "personal assistant", "pals officer", "mdt coordinator",
-    "practice manager", "voluntary services", "call handler", "call taker",
-    # finance
-    "finance officer", "finance analyst", "finance assistant", "finance manager",
-    "accountant", "procurement", "commissioning manager", "payroll",
-    # human resources
-    "hr assistant", "hr advisor", "hr manager", "hr administrator",
-    "workforce advisor", "resourcing", "recruitment advisor",
-    "learning and development", "organisational development",
-    # IT & informatics
-    "it support", "im&t analyst", "information analyst", "systems analyst",
-    "network manager", "data analyst", "informatics", "digital", "programmer",
-    "developer", "cybersecurity", "helpdesk",
-    # communications & PR
-    "communications officer", "pr executive", "media officer", "graphic designer",
-    "complaints officer", "engagement officer",
-    # estates & facilities
-    "porter", "domestic", "cleaner", "catering", "laundry", "facilities manager",
-    "estates manager", "estates officer", "maintenance engineer", "electrician",
-    "plumber", "gardener", "security officer", "driver", "transport",
-    "fm assistant", "switchboard", "sterile services", "decontamination",
-    # nursing & midwifery
-    "healthcare assistant", "healthcare support worker", "nursing associate",
-    "ward sister", "charge nurse", "staff nurse", "district nurse", "health visitor",
-    "school nurse", "community nurse", "maternity support worker",
-    # allied health professions
-    "occupational therapist", "dietitian", "podiatrist",
-    "speech and language therapist", "orthoptist", "optometrist", "paramedic",
-    "ambulance practitioner", "prosthetist", "orthotist",
-    "operating department practitioner", "odp", "art therapist", "music therapist",
-    "dramatherapist", "play specialist", "sexual health adviser",
-    # healthcare science & laboratory
-    "biomedical scientist", "clinical scientist", "phlebotomist",
-    "healthcare scientist", "medical physicist", "clinical physiologist",
-    "cardiac physiologist", "respiratory physiologist", "cytology screener",
-    "pathology technician", "mortuary technician", "genetic counsellor", "audiologist",
-    "medical engineering technician", "laboratory assistant", "technician",
-    "physiologist",
-    # pharmacy
-    "pharmacy technician", "pharmacy support worker", "dispensing assistant",
-    "medicines management",
-    # psychology, mental health & chaplaincy
-    "psychologist", "psychotherapist", "psychological wellbeing practitioner",
-    "mental health worker", "chaplain", "pastoral", "welfare officer",
-    # dental
-    "dentist", "dental", "dental technician", "dental nurse", "dental therapist",
-    "oral health practitioner", "dental hygienist", "orthodontic therapist",
-    # management & leadership
-    "head of service", "operations manager", "general manager", "service manager",
-    "improvement manager", "programme manager", "project manager", "project officer",
-    # library & information
-    "librarian", "library technician", "knowledge officer",
-    # public health & health improvement
-    "public health practitioner", "health improvement practitioner",
-    "health promotion officer", "screening practitioner", "public health researcher",
-    "clinical governance", "quality improvement", "clinical audit",
-    # medical associate professions
-    "physician associate", "surgical care practitioner",
-    "advanced clinical practitioner", "advanced nurse practitioner",
-    "advanced practitioner", "anaesthesia associate",
-    # misc
-    "gp", "sister", "maxillofacial", "clerical", "oral", "hca", "failsafe", "orthopedic", "store person",
-]
-
-# ================= SHARED EXCLUDE LIST ================= #
-_COMMON_EXCLUDES = [
-    "consultant", "nurse", "midwife", "assistant", "manager", "director", "admin",
-    "physiotherapist", "radiographer", "lead", "scientist", "receptionist",
-    "housekeeper", "cook", "clerk", "practitioner", "nutritionist", "nutrition",
-    "coordinator", "therapist", "secretary", "pharmacist", "matron", "worker",
-    "pharmacy", "chief", "counseling", "principal",
-    # admin, clerical & office
-    "ward clerk", "health records", "medical records", "clinical coder",
-    "coding officer", "personal assistant", "pals officer", "mdt coordinator",
-    "practice manager", "voluntary services", "call handler", "call taker",
-    # finance
-    "finance officer", "finance analyst", "finance assistant", "finance manager",
-    "accountant", "procurement", "commissioning manager", "payroll",
-    # human resources
-    "hr assistant", "hr advisor", "hr manager", "hr administrator",
-    "workforce advisor", "resourcing", "recruitment advisor",
-    "learning and development", "organisational development",
-    # IT & informatics
-    "it support", "im&t analyst", "information analyst", "systems analyst",
-    "network manager", "data analyst", "informatics", "digital", "programmer",
-    "developer", "cybersecurity", "helpdesk",
-    # communications & PR
-    "communications officer", "pr executive", "media officer", "graphic designer",
-    "complaints officer", "engagement officer",
-    # estates & facilities
-    "porter", "domestic", "cleaner", "catering", "laundry", "facilities manager",
-    "estates manager", "estates officer", "maintenance engineer", "electrician",
-    "plumber", "gardener", "security officer", "driver", "transport",
-    "fm assistant", "switchboard", "sterile services", "decontamination",
-    # nursing & midwifery
-    "healthcare assistant", "healthcare support worker", "nursing associate",
-    "ward sister", "charge nurse", "staff nurse", "district nurse", "health visitor",
-    "school nurse", "community nurse", "maternity support worker",
-    # allied health professions
-    "occupational therapist", "dietitian", "podiatrist",
-    "speech and language therapist", "orthoptist", "optometrist", "paramedic",
-    "ambulance practitioner", "prosthetist", "orthotist",
-    "operating department practitioner", "odp", "art therapist", "music therapist",
-    "dramatherapist", "play specialist", "sexual health adviser",
-    # healthcare science & laboratory
-    "biomedical scientist", "clinical scientist", "phlebotomist",
-    "healthcare scientist", "medical physicist", "clinical physiologist",
-    "cardiac physiologist", "respiratory physiologist", "cytology screener",
-    "pathology technician", "mortuary technician", "genetic counsellor", "audiologist",
-    "medical engineering technician", "laboratory assistant", "technician",
-    "physiologist",
-    # pharmacy
-    "pharmacy technician", "pharmacy support worker", "dispensing assistant",
-    "medicines management",
-    # psychology, mental health & chaplaincy
-    "psychologist", "psychotherapist", "psychological wellbeing practitioner",
-    "mental health worker", "chaplain", "pastoral", "welfare officer",
-    # dental
-    "dentist", "dental", "dental technician", "dental nurse", "dental therapist",
-    "oral health practitioner", "dental hygienist", "orthodontic therapist",
-    # management & leadership
-    "head of service", "operations manager", "general manager", "service manager",
-    "improvement manager", "programme manager", "project manager", "project officer",
-    # library & information
-    "librarian", "library technician", "knowledge officer",
-    # public health & health improvement
-    "public health practitioner", "health improvement practitioner",
-    "health promotion officer", "screening practitioner", "public health researcher",
-    "clinical governance", "quality improvement", "clinical audit",
-    # medical associate professions
-    "physician associate", "surgical care practitioner",
-    "advanced clinical practitioner", "advanced nurse practitioner",
-    "advanced practitioner", "anaesthesia associate",
-    # misc
-    "gp", "sister", "maxillofacial", "clerical", "oral", "hca", "failsafe", "orthopedic", "store person",
-]
-
-# ================= SPECIALTY WHOP CHANNELS ================= #
-# Each entry: urls scraped, specialty/grade/exclude filters, Whop channel_id.
-# Same EARLY_DELAY rule applies: personal Telegram fires immediately,
-# Whop channel fires after EARLY_DELAY seconds.
-SPECIALTY_CHANNELS = [
-    {
-        "name": "Surgical Jobs",
-        "whop_channel": "chat_feed_1CbZauPFt68E7nrkkwbHj5",
-        "urls": [
-            "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=594&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=19024&_srt=startdate&_sd=a",
-            "https://www.jobs.nhs.uk/candidate/search/results?staffGroup=MEDICAL_AND_DENTAL&payRange=40-50%2C50-60%2C60-70&searchFormType=sortBy&sort=publicationDateDesc&language=en",
-            "https://jobs.hscni.net/Search?keyword=&SearchCatID=63&SearchOrgID=0&SearchBandID=0&Order=Added",
-            "https://apply.jobs.scot.nhs.uk/Home/Job",
-        ],
-        "specialties": ["surgery", "general surgery", "trauma", "orthopaedic", "plastic", "vascular", "urology", "neurosurgery", "pediatric surgery"],
-        "excludes":    _COMMON_EXCLUDES + ["oral"],
-    },
-    {
-        "name": "Medicine Jobs",
-        "whop_channel": "chat_feed_1CbZb7mwvyDvY6rugrvuQr",
-        "urls": [
-            "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=558&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=59162&_srt=startdate&_sd=a",
-            "https://www.jobs.nhs.uk/candidate/search/results?staffGroup=MEDICAL_AND_DENTAL&payRange=40-50%2C50-60%2C60-70&searchFormType=sortBy&sort=publicationDateDesc&language=en",
-            "https://jobs.hscni.net/Search?keyword=&SearchCatID=63&SearchOrgID=0&SearchBandID=0&Order=Added",
-            "https://apply.jobs.scot.nhs.uk/Home/Job",
-        ],
-        "specialties": [
-    "general medicine", "internal medicine", "acute medicine", "acute medical",
-    "general internal medicine", "gim", "amau", "amu",
-    "cardiology", "cardiac medicine",
-    "respiratory", "chest medicine", "pulmonology",
-    "gastroenterology", "gastro medicine",
-    "neurology",
-    "endocrinology", "diabetes",
-    "renal", "nephrology",
-    "rheumatology",
-    "haematology", "hematology",
-    "oncology", "medical oncology",
-    "dermatology",
-    "infectious diseases",
-    "rehabilitation medicine",
-    "care of the elderly", "geriatric", "medicine for the elderly"],
-        "excludes":    _COMMON_EXCLUDES + [
-    "theatre", "operating", "surgeon", "surgery", "surgical", "orthopaedic",
-    "urology", "plastics", "neurosurgery", "ophthalmology", "ent", "otolaryngology",
-    "emergency medicine", "a&e", "accident & emergency", "accident and emergency",
-    "intensive care", "icu", "hdu", "critical care", "anaesthetics", "anaesthesia",
-    "paediatric", "pediatric", "neonatal"],
-    },
-    {
-        "name": "Anesthesia and ICU Jobs",
-        "whop_channel": "chat_feed_1CbZbCEg9WepzQtqoxYjHH",
-        "urls": [
-            "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=555&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=88194",
-            "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=535&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=91141",
-            "https://www.jobs.nhs.uk/candidate/search/results?staffGroup=MEDICAL_AND_DENTAL&payRange=40-50%2C50-60%2C60-70&searchFormType=sortBy&sort=publicationDateDesc&language=en",
-            "https://jobs.hscni.net/Search?keyword=&SearchCatID=63&SearchOrgID=0&SearchBandID=0&Order=Added",
-            "https://apply.jobs.scot.nhs.uk/Home/Job",
-        ],
-        "specialties": ["dependency", "intensive care", "critical care", "icu", "hdu", "anesthesia", "anaesthesia", "anaesthetic", "anaesthetics", "palliative"],
-        "excludes":    _COMMON_EXCLUDES,
-    },
-    {
-        "name": "Pediatrics Jobs",
-        "whop_channel": "chat_feed_1CbZbHh1CLMadCjC1VMCkU",
-        "urls": [
-            "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=578&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=193183",
-            "https://www.jobs.nhs.uk/candidate/search/results?staffGroup=MEDICAL_AND_DENTAL&payRange=40-50%2C50-60%2C60-70&searchFormType=sortBy&sort=publicationDateDesc&language=en",
-            "https://jobs.hscni.net/Search?keyword=&SearchCatID=63&SearchOrgID=0&SearchBandID=0&Order=Added",
-            "https://apply.jobs.scot.nhs.uk/Home/Job",
-        ],
-        "specialties": ["pediatric", "pediatrics", "paediatric", "paediatrics"],
-        "excludes":    _COMMON_EXCLUDES,
-    },
-    {
-        "name": "Obstetrics and Gynecology Jobs",
-        "whop_channel": "chat_feed_1CbZbMAbDin4GKPrmer3bD",
-        "urls": [
-            "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=567&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=198861",
-            "https://www.jobs.nhs.uk/candidate/search/results?staffGroup=MEDICAL_AND_DENTAL&payRange=40-50%2C50-60%2C60-70&searchFormType=sortBy&sort=publicationDateDesc&language=en",
-            "https://jobs.hscni.net/Search?keyword=&SearchCatID=63&SearchOrgID=0&SearchBandID=0&Order=Added",
-            "https://apply.jobs.scot.nhs.uk/Home/Job",
-        ],
-        "specialties": ["obstetrics", "gynaecology", "gynecology", "obs", "gynae", "maternity"],
-        "excludes":    _COMMON_EXCLUDES,
-    },
-    {
-        "name": "Emergency Medicine Jobs",
-        "whop_channel": "chat_feed_1CbZbQc9yXPUWpEE5NXPCB",
-        "urls": [
-            "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=534&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=204916",
-            "https://www.jobs.nhs.uk/candidate/search/results?staffGroup=MEDICAL_AND_DENTAL&payRange=40-50%2C50-60%2C60-70&searchFormType=sortBy&sort=publicationDateDesc&language=en",
-            "https://jobs.hscni.net/Search?keyword=&SearchCatID=63&SearchOrgID=0&SearchBandID=0&Order=Added",
-            "https://apply.jobs.scot.nhs.uk/Home/Job",
-        ],
-        "specialties": ["emergency", "accident", "a&e", "ed ", "resus", "accident & emergency", "accident and emergency", "pemed"],
-        "excludes":    _COMMON_EXCLUDES,
-    },
-    {
-        "name": "Ophthalmology Jobs",
-        "whop_channel": "chat_feed_1CbZba5ncFusdNv7sYB9uH",
-        "urls": [
-            "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=570&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=212800",
-            "https://www.jobs.nhs.uk/candidate/search/results?staffGroup=MEDICAL_AND_DENTAL&payRange=40-50%2C50-60%2C60-70&searchFormType=sortBy&sort=publicationDateDesc&language=en",
-            "https://jobs.hscni.net/Search?keyword=&SearchCatID=63&SearchOrgID=0&SearchBandID=0&Order=Added",
-            "https://apply.jobs.scot.nhs.uk/Home/Job",
-        ],
-        "specialties": ["ophthalmology", "eyes", "eye clinic", "eye", "vitreoretinal"],
-        "excludes":    _COMMON_EXCLUDES,
-    },
-    {
-        "name": "ENT Jobs",
-        "whop_channel": "chat_feed_1CbZbeHpodD6MoAZPueKFz",
-        "urls": [
-            "https://www.healthjobsuk.com/job_list?JobSearch_q=&JobSearch_d=1088&JobSearch_g=&JobSearch_re=_POST&JobSearch_re_0=1&JobSearch_re_1=1-_-_-&JobSearch_re_2=1-_-_--_-_-&JobSearch_Submit=Search&_tr=JobSearch&_ts=218046",
-            "https://www.jobs.nhs.uk/candidate/search/results?staffGroup=MEDICAL_AND_DENTAL&payRange=40-50%2C50-60%2C60-70&searchFormType=sortBy&sort=publicationDateDesc&language=en",
-            "https://jobs.hscni.net/Search?keyword=&SearchCatID=63&SearchOrgID=0&SearchBandID=0&Order=Added",
-            "https://apply.jobs.scot.nhs.uk/Home/Job",
-        ],
-        "specialties": ["ent", "ear nose throat", "otolaryngology", "head and neck surgery"],
-        "excludes":    _COMMON_EXCLUDES,
-    },
+# Scraped URLs, routing keywords and specialty channels (see load_filter_config).
+# Re-read when the file changes or on SIGHUP, without restarting the browser.
+FILTERS_PATH = os.environ.get("FILTERS_PATH",
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), "filters.json"))
+FILTERS_RELOAD_INTERVAL = 5   # seconds between mtime checks
+
+# Newest-first listings followed past page one during posting bursts:
+# URL marker, page query parameter and per-site page cap.
+PAGINATED_LISTINGS = [
+    {"match": "_srt=publicationdate",     "param": "_pg",  "max_pages": 5},   # HealthJobsUK
+    {"match": "sort=publicationDateDesc", "param": "page", "max_pages": 5},   # NHS Jobs
 ]
 
 VIEWPORTS = [
@@ -427,45 +117,670 @@ VIEWPORTS = [
 def log(msg: str):
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", flush=True)
 
-# ================= SEEN-JOBS PERSISTENCE ================= #
-_seen_lock = asyncio.Lock()
-SEEN_JOBS_PATH = os.environ.get("SEEN_JOBS_PATH", "seen_jobs.txt")
+# ================= METRICS ================= #
+# Plain dicts of counters and bucket counts keyed by label values: an
+# observation is a bisect and a few integer adds, cheap enough to leave on.
+# Rendered in the Prometheus text format only when /metrics is scraped.
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labelvalues, n: float = 1):
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + n
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        out += [f"{self.name}{_labels(self.labels, lv)} {v}" for lv, v in self.values.items()]
+        return out
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = _LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.values: dict[tuple, list] = {}   # labelvalues → [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labelvalues):
+        v = self.values.get(labelvalues)
+        if v is None:
+            v = self.values[labelvalues] = [0] * (len(self.buckets) + 2)
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            v[i] += 1
+        v[-2] += value
+        v[-1] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labelvalues)
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for lv, v in self.values.items():
+            cumulative = 0
+            for le, n in zip(self.buckets, v):
+                cumulative += n
+                out.append(f"{self.name}_bucket{_labels(self.labels + ('le',), lv + (le,))} {cumulative}")
+            out.append(f"{self.name}_bucket{_labels(self.labels + ('le',), lv + ('+Inf',))} {v[-1]}")
+            out.append(f"{self.name}_sum{_labels(self.labels, lv)} {v[-2]}")
+            out.append(f"{self.name}_count{_labels(self.labels, lv)} {v[-1]}")
+        return out
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = (f'{k}="{_escape_label(v)}"' for k, v in zip(names, values))
+    return "{" + ",".join(pairs) + "}"
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+STAGE_SECONDS = Histogram("nhsbot_stage_seconds",
+                          "Time per scrape stage (navigate, scroll, extract, content, http_fetch, parse, filter, detail)",
+                          ("stage", "url"))
+DELIVERY_SECONDS = Histogram("nhsbot_delivery_seconds", "Time to deliver one message, retries included", ("api",))
+TIME_TO_ALERT = Histogram("nhsbot_time_to_alert_seconds", "First seen by the scraper → delivered",
+                          ("site", "destination"),
+                          (5, 15, 30, 60, 120, 300, 330, 360, 600, 900, 1800, 3600, 7200))
+CTX_WAIT_SECONDS = Histogram("nhsbot_ctx_sem_wait_seconds", "Wait for a browser context slot")
+CANDIDATES   = Counter("nhsbot_candidates_total", "Job cards parsed from a listing", ("url",))
+NEW_JOBS     = Counter("nhsbot_new_jobs_total", "Jobs alerted (or seeded on the first pass)", ("url",))
+NAV_ERRORS   = Counter("nhsbot_navigation_errors_total", "Failed navigation attempts", ("url", "kind"))
+DELIVERIES   = Counter("nhsbot_deliveries_total", "Send attempts: sent, failed (retried) or dead (rejected)", ("api", "result"))
+RECYCLES     = Counter("nhsbot_browser_recycles_total", "Browser recycles by trigger", ("trigger",))
+DETAILS      = Counter("nhsbot_detail_pages_total", "Detail-page lookups for enrichment", ("result",))
+_METRICS = [STAGE_SECONDS, TIME_TO_ALERT, DELIVERY_SECONDS, CTX_WAIT_SECONDS, CANDIDATES, NEW_JOBS, NAV_ERRORS,
+            DELIVERIES, RECYCLES, DETAILS]
+_gauges: list = []   # callables returning [(name, help, labels, value), ...] at scrape time
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def _ppid_map() -> dict[int, int]:
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat", "rb") as f:
+                    stat = f.read()
+                parents[int(entry)] = int(stat[stat.rindex(b")") + 2:].split()[1])
+            except (OSError, ValueError, IndexError):
+                pass
+    return parents
+
+def _rss(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def process_tree_rss(root: int | None = None) -> tuple[int, int]:
+    """(RSS of this process, summed RSS of all its descendants — the Playwright driver and Chromium)."""
+    root = root or os.getpid()
+    children: dict[int, list[int]] = {}
+    for pid, ppid in _ppid_map().items():
+        children.setdefault(ppid, []).append(pid)
+    total, stack = 0, list(children.get(root, ()))
+    while stack:
+        pid = stack.pop()
+        total += _rss(pid)
+        stack.extend(children.get(pid, ()))
+    return _rss(root), total
+
+def _process_gauges() -> list[tuple]:
+    own, browser = process_tree_rss()
+    return [("nhsbot_process_rss_bytes", "Resident memory", ("process",), (("python", own), ("browser", browser)))]
+
+_gauges.append(_process_gauges)
+
+def render_metrics() -> str:
+    lines = []
+    for m in _METRICS:
+        lines += m.render()
+    for source in _gauges:
+        try:
+            for name, help, labels, samples in source():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+                lines += [f"{name}{_labels(labels, lv if isinstance(lv, tuple) else (lv,))} {v}"
+                          for lv, v in samples]
+        except Exception as e:
+            log(f"⚠️  Metrics gauge error: {e}")
+    return "\n".join(lines) + "\n"
+
+async def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST):
+    async def handle(request):
+        return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    log(f"📈 Metrics on http://{host}:{port}/metrics")
+    return runner
 
-def load_seen() -> set:
+# ================= SEEN-JOBS PERSISTENCE ================= #
+SEEN_JOBS_PATH  = os.environ.get("SEEN_JOBS_PATH", "seen_jobs.txt")    # legacy flat file, migrated once
+SEEN_DB_PATH    = os.environ.get("SEEN_DB_PATH", "seen_jobs.db")       # ":memory:" for a throwaway store
+SEEN_BLOOM_PATH = os.environ.get("SEEN_BLOOM_PATH", "seen_jobs.bloom")
+SEEN_BLOOM_BITS = int(os.environ.get("SEEN_BLOOM_BITS", str(1 << 24)))  # 2 MiB; 0 disables the tier
+SEEN_BLOOM_MAX_FILL  = 0.5      # share of bits set before the Bloom tier starts a new generation (~0.8% false positives)
+SEEN_BLOOM_MAX_AGE   = 180 * 86400  # ...or once a generation is this old
+SEEN_TTL_DAYS        = 60       # expiry when a job has no parseable closing date
+SEEN_CLOSING_GRACE   = 7 * 86400  # adverts often linger (or get extended) past the closing date
+SEEN_EVICT_INTERVAL  = 3600
+SEEN_CLAIM_TIMEOUT   = 250      # ms a shared claim waits on another worker's write lock; the loop is blocked meanwhile
+RESUME_WINDOW        = 12 * 3600  # URLs checked this recently alert straight after a restart; older ones re-seed
+DUP_WINDOW_DAYS      = 14       # how long an alerted advert suppresses copies from other boards
+DUP_TITLE_SIMILARITY = 0.8      # token Jaccard for two titles to count as the same post
+
+_MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+
+def parse_closing_date(text: str) -> datetime | None:
+    """'14/11/2025', '14 November 2025', 'Friday 14th Nov 2025 23:59' → end of that day."""
+    if not text:
+        return None
+    m = re.search(r"(\d{1,2})/(\d{1,2})/(\d{4})", text)
+    if m:
+        day, month, year = int(m.group(1)), int(m.group(2)), int(m.group(3))
+    else:
+        m = re.search(r"(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3,})\.?,?\s+(\d{4})", text)
+        if not m or m.group(2)[:3].lower() not in _MONTHS:
+            return None
+        day, month, year = int(m.group(1)), _MONTHS[m.group(2)[:3].lower()], int(m.group(3))
     try:
-        with open(SEEN_JOBS_PATH, "r") as f:
-            return set(f.read().splitlines())
-    except FileNotFoundError:
-        return set()
+        return datetime(year, month, day, 23, 59, 59)
+    except ValueError:
+        return None
+
+def seen_expiry(job: dict) -> float:
+    closing = parse_closing_date(job.get("closing_date", ""))
+    if closing:
+        return closing.timestamp() + SEEN_CLOSING_GRACE
+    return time.time() + SEEN_TTL_DAYS * 86400
+
+def publication_time(job: dict) -> float | None:
+    """Start of the day the listing says the advert was posted, where the board shows it."""
+    posted = parse_closing_date(job.get("posted", ""))
+    return posted.replace(hour=0, minute=0, second=0).timestamp() if posted else None
+
+class BloomFilter:
+    """Fixed-size Bloom filter (double hashing over one blake2b digest)."""
+
+    def __init__(self, nbits: int, k: int = 7):
+        self.nbits = nbits
+        self.k = k
+        self.bits = bytearray((nbits + 7) // 8)
+
+    def _positions(self, key: str):
+        d = hashlib.blake2b(key.encode("utf-8", "replace"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(d[:8], "little"), int.from_bytes(d[8:], "little") | 1
+        return ((h1 + i * h2) % self.nbits for i in range(self.k))
+
+    def add(self, key: str):
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def fill(self) -> float:
+        """Share of bits set; the false-positive rate is about fill ** k."""
+        return int.from_bytes(self.bits, "little").bit_count() / self.nbits
+
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, nbits: int) -> "BloomFilter":
+        bf = cls(nbits)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) == len(bf.bits):
+                bf.bits[:] = data
+        except FileNotFoundError:
+            pass
+        return bf
+
+_DUP_STOPWORDS = frozenset(
+    "a an and at for in of on the to with nhs trust foundation hospital hospitals".split())
+
+def _dup_tokens(text: str) -> frozenset:
+    text = (text or "").lower().replace("&", " and ")
+    return frozenset(w for w in re.findall(r"[a-z0-9]+", text) if w not in _DUP_STOPWORDS)
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+# Words on a large share of NHS titles; ordered last so they rarely pick a bucket
+_DUP_COMMON = frozenset(
+    "nurse nursing registered staff band senior junior assistant practitioner support worker"
+    " manager lead specialist clinical health care healthcare community ward day night".split())
+
+def _dup_prefix(tokens: frozenset) -> list[str]:
+    """
+    Prefix filtering: with tokens in one fixed order (distinctive words
+    first), two titles whose Jaccard is at least DUP_TITLE_SIMILARITY must
+    share a token among the first len - ceil(t·len) + 1 of each.
+    """
+    ordered = sorted(tokens, key=lambda w: (w in _DUP_COMMON, w))
+    return ordered[:len(ordered) - math.ceil(DUP_TITLE_SIMILARITY * len(ordered) - 1e-9) + 1]
+
+class DuplicateIndex:
+    """
+    Fingerprints of recently alerted adverts — normalised title, employer and
+    location tokens plus closing date — for spotting the same post listed on
+    another board under a different URL and job ID. Entries are bucketed in a
+    dict under each of a few distinctive title words (see _dup_prefix), so a
+    lookup only compares entries sharing one of them — which every title
+    within the Jaccard threshold does — and then accepts a near match (see
+    _same_post). Held in memory, persisted next to the seen table and
+    trimmed to DUP_WINDOW_DAYS. For a shared store (sharded workers on one
+    database), SeenStore.claim() calls claim_locked() inside its write
+    transaction, which first pulls in entries other processes have written
+    and records its own straight away.
+    """
 
-async def async_save_seen(job_id: str):
-    async with _seen_lock:
-        with open(SEEN_JOBS_PATH, "a") as f:
-            f.write(job_id + "\n")
+    def __init__(self, db: sqlite3.Connection, window: float = DUP_WINDOW_DAYS * 86400):
+        self._db = db
+        self.window = window
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dupes ("
+            " job_id TEXT PRIMARY KEY, site TEXT, title TEXT, employer TEXT, location TEXT,"
+            " closing TEXT, seen_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS dupes_seen_at ON dupes (seen_at)")
+        self._buckets: dict[str, list[tuple]] = {}
+        self._pending: list[tuple] = []
+        self._ids: set[str] = set()
+        self._synced = 0.0
+        self._load(time.time() - window)
+
+    def _load(self, since: float):
+        for row in self._db.execute(
+                "SELECT job_id, site, title, employer, location, closing, seen_at FROM dupes"
+                " WHERE seen_at >= ?", (since,)):
+            job_id, site, title, employer, location, closing, seen_at = row
+            if job_id not in self._ids:
+                self._index((job_id, site, frozenset(title.split()), frozenset(employer.split()),
+                             frozenset(location.split()), closing, seen_at))
+            self._synced = max(self._synced, seen_at)
+
+    @staticmethod
+    def _fingerprint(job_id: str, job: dict, now: float) -> tuple:
+        closing = parse_closing_date(job.get("closing_date", ""))
+        return (job_id, job.get("site", "generic"), _dup_tokens(job.get("title")),
+                _dup_tokens(job.get("employer")), _dup_tokens(job.get("location")),
+                closing.date().isoformat() if closing else "", now)
+
+    @staticmethod
+    def _keys(fp: tuple) -> list[str]:
+        return _dup_prefix(fp[2])
+
+    def _index(self, fp: tuple):
+        self._ids.add(fp[0])
+        for key in self._keys(fp):
+            self._buckets.setdefault(key, []).append(fp)
+
+    @staticmethod
+    def _same_post(a: tuple, b: tuple) -> bool:
+        if a[1] == b[1] or _jaccard(a[2], b[2]) < DUP_TITLE_SIMILARITY:
+            return False
+        if a[5] and b[5] and a[5] != b[5]:
+            return False
+        agree = False
+        if a[3] and b[3]:
+            if _jaccard(a[3], b[3]) < 0.5:
+                return False
+            agree = True
+        if a[4] and b[4]:
+            if not a[4] & b[4]:
+                return False
+            agree = True
+        return agree
+
+    def claim(self, job_id: str, job: dict, now: float | None = None) -> str | None:
+        """
+        Job ID of an earlier copy of this advert from another board within the
+        window, or None — in which case this job is indexed as the original
+        and written by the next flush(). Single-process only; shared stores
+        go through claim_locked().
+        """
+        now = now or time.time()
+        fp = self._fingerprint(job_id, job, now)
+        if not fp[2]:
+            return None
+        original = self._match(fp, now)
+        if original is None:
+            self._index(fp)
+            self._pending.append(fp)
+        return original
+
+    def claim_locked(self, fp: tuple, now: float) -> str | None:
+        """
+        Shared-mode claim for a caller already inside a write transaction:
+        pulls in other workers' rows and writes this one if it is an
+        original. The caller indexes `fp` in memory once it has committed.
+        """
+        # Other workers' rows can carry a slightly earlier seen_at than the last one we read
+        self._load(self._synced - 60)
+        original = self._match(fp, now)
+        if original is None:
+            self._pending.append(fp)
+            self._flush_pending()
+        return original
+
+    def _match(self, fp: tuple, now: float) -> str | None:
+        cutoff = now - self.window
+        compared = set()
+        for key in self._keys(fp):
+            for other in self._buckets.get(key, ()):
+                if other[0] in compared:
+                    continue
+                compared.add(other[0])
+                if other[6] >= cutoff and self._same_post(fp, other):
+                    return other[0]
+        return None
+
+    def _flush_pending(self):
+        rows = [(job_id, site, " ".join(sorted(t)), " ".join(sorted(e)), " ".join(sorted(loc)), closing, at)
+                for job_id, site, t, e, loc, closing, at in self._pending]
+        self._db.executemany(
+            "INSERT OR REPLACE INTO dupes (job_id, site, title, employer, location, closing, seen_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self._pending.clear()
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._db.execute("BEGIN")
+        try:
+            self._flush_pending()
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def prune(self, now: float | None = None):
+        cutoff = (now or time.time()) - self.window
+        self._db.execute("DELETE FROM dupes WHERE seen_at < ?", (cutoff,))
+        for key in list(self._buckets):
+            kept = [fp for fp in self._buckets[key] if fp[6] >= cutoff]
+            if kept:
+                self._buckets[key] = kept
+            else:
+                del self._buckets[key]
+        self._ids = {fp[0] for fps in self._buckets.values() for fp in fps}
+
+    def forget(self, job_id: str):
+        """Drop job_id's entry, e.g. when its alert could not be queued after the claim."""
+        self._db.execute("DELETE FROM dupes WHERE job_id = ?", (job_id,))
+        self._pending = [fp for fp in self._pending if fp[0] != job_id]
+        if job_id not in self._ids:
+            return
+        self._ids.discard(job_id)
+        for key in list(self._buckets):
+            kept = [fp for fp in self._buckets[key] if fp[0] != job_id]
+            if kept:
+                self._buckets[key] = kept
+            else:
+                del self._buckets[key]
+
+class SeenStore:
+    """
+    Seen job IDs in an indexed SQLite table (WAL mode), each with an expiry:
+    the job's closing date (+ grace) when known, otherwise SEEN_TTL_DAYS.
+    Lookups go to the primary-key index rather than a RAM set; new IDs are
+    buffered by add() and written in one transaction by flush(), once per
+    cycle. evict_expired() drops dead adverts, folding their IDs into an
+    optional Bloom filter so a long-lingering listing is still recognised.
+    The Bloom tier keeps two generations (SEEN_BLOOM_PATH and *.old): when
+    the current one passes SEEN_BLOOM_MAX_FILL or SEEN_BLOOM_MAX_AGE it
+    becomes the old one and the previous old one is dropped, so false
+    positives stay bounded and an evicted ID is remembered for one to two
+    generations.
+    With `shared` (several worker processes on one database) claim() writes
+    through at once, so the INSERT decides which process alerts a job.
+    """
 
-# ================= TELEGRAM QUEUE ================= #
-_tg_queue: asyncio.Queue = asyncio.Queue()
+    def __init__(self, path: str = SEEN_DB_PATH, bloom_path: str = SEEN_BLOOM_PATH,
+                 bloom_bits: int = SEEN_BLOOM_BITS, shared: bool = False):
+        self.path = path
+        self.shared = shared
+        # main() opens the store in a worker thread while the browser launches
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " job_id TEXT PRIMARY KEY, first_seen REAL NOT NULL, expires_at REAL"
+            ") WITHOUT ROWID"
+        )
+        cols = {row[1] for row in self._db.execute("PRAGMA table_info(seen)")}
+        if "expires_at" not in cols:
+            self._db.execute("ALTER TABLE seen ADD COLUMN expires_at REAL")
+            self._db.execute("UPDATE seen SET expires_at = ?", (time.time() + SEEN_TTL_DAYS * 86400,))
+        self._db.execute("CREATE INDEX IF NOT EXISTS seen_expires ON seen (expires_at)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " url TEXT PRIMARY KEY, checked_at REAL NOT NULL, state TEXT NOT NULL)"
+        )
+        self._pending: dict[str, tuple[float, float]] = {}
+        self._checkpoints: dict[str, tuple[float, str]] = {}
+        self._bloom_path = bloom_path
+        self._bloom_bits = bloom_bits
+        self._bloom = self._bloom_old = None
+        self._bloom_since = time.time()
+        self._bloom_mtimes = None
+        self.reload_bloom()
+        self.dupes = DuplicateIndex(self._db)
+
+    @staticmethod
+    def _mtime(path: str) -> float | None:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def __contains__(self, job_id: str) -> bool:
+        if job_id in self._pending:
+            return True
+        if self._db.execute("SELECT 1 FROM seen WHERE job_id = ?", (job_id,)).fetchone() is not None:
+            return True
+        return self._bloom is not None and (job_id in self._bloom or job_id in self._bloom_old)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM seen").fetchone()[0] + len(self._pending)
+
+    def add(self, job_id: str, expires_at: float | None = None):
+        now = time.time()
+        self._pending.setdefault(job_id, (now, expires_at or now + SEEN_TTL_DAYS * 86400))
+
+    def unclaim(self, job_id: str):
+        """Undo claim(): the job is unseen again (here and for other workers) and no longer an original."""
+        self._pending.pop(job_id, None)
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute("DELETE FROM seen WHERE job_id = ?", (job_id,))
+            self.dupes.forget(job_id)
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def claim(self, job_id: str, job: dict, expires_at: float | None = None) -> tuple[bool, str | None]:
+        """
+        Mark job_id seen and check it against the duplicate index: (claimed,
+        earlier copy's job ID or None). claimed is False if the ID already was
+        seen (here or, when shared, by another process). When shared both
+        writes go in one transaction, so a
+        failure (e.g. another worker holding the lock past SEEN_CLAIM_TIMEOUT)
+        leaves the job unclaimed for the next check to retry.
+        """
+        if job_id in self:
+            return False, None
+        if not self.shared:
+            original = self.dupes.claim(job_id, job)
+            self.add(job_id, expires_at)
+            return True, original
+        now = time.time()
+        fp = self.dupes._fingerprint(job_id, job, now)
+        self._db.execute(f"PRAGMA busy_timeout={SEEN_CLAIM_TIMEOUT}")
+        try:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self._db.execute(
+                    "INSERT OR IGNORE INTO seen (job_id, first_seen, expires_at) VALUES (?, ?, ?)",
+                    (job_id, now, expires_at or now + SEEN_TTL_DAYS * 86400))
+                claimed = cur.rowcount == 1
+                original = self.dupes.claim_locked(fp, now) if claimed and fp[2] else None
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        finally:
+            self._db.execute("PRAGMA busy_timeout=5000")
+        if claimed and fp[2] and original is None:
+            self.dupes._index(fp)
+        return claimed, original
+
+    def checkpoint(self, url: str, state: dict):
+        """Note a successful check of `url` with its listing fingerprint; written by flush()."""
+        self._checkpoints[url] = (time.time(), json.dumps(state))
+
+    def checkpoints(self, since: float) -> dict[str, tuple[float, dict]]:
+        """url → (last successful check, state) for URLs checked at or after `since`."""
+        return {url: (at, json.loads(state)) for url, at, state in self._db.execute(
+            "SELECT url, checked_at, state FROM checkpoints WHERE checked_at >= ?", (since,))}
+
+    def reload_bloom(self):
+        """(Re)load the Bloom generations, e.g. after the process that runs eviction rewrote them."""
+        mtimes = (self._mtime(self._bloom_path), self._mtime(self._bloom_path + ".old"))
+        if not self._bloom_bits or mtimes == self._bloom_mtimes:
+            return
+        self._bloom = BloomFilter.load(self._bloom_path, self._bloom_bits)
+        self._bloom_old = BloomFilter.load(self._bloom_path + ".old", self._bloom_bits)
+        # The current generation started when the old one was rotated out
+        self._bloom_since = mtimes[1] or self._bloom_since
+        self._bloom_mtimes = mtimes
+
+    def _rotate_bloom(self, now: float):
+        if self._bloom.fill() < SEEN_BLOOM_MAX_FILL and now - self._bloom_since < SEEN_BLOOM_MAX_AGE:
+            return
+        log(f"🧹 Seen store: starting a new Bloom generation ({self._bloom.fill():.0%} full).")
+        os.replace(self._bloom_path, self._bloom_path + ".old")
+        self._bloom_old, self._bloom = self._bloom, BloomFilter(self._bloom_bits)
+        self._bloom.save(self._bloom_path)
+        self._bloom_since = now
+
+    def flush(self) -> int:
+        """Write buffered IDs and checkpoints in one transaction; returns how many IDs were written."""
+        self.dupes.flush()
+        if not self._pending and not self._checkpoints:
+            return 0
+        rows = [(job_id, first, exp) for job_id, (first, exp) in self._pending.items()]
+        self._db.execute("BEGIN")
+        try:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO seen (job_id, first_seen, expires_at) VALUES (?, ?, ?)", rows)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO checkpoints (url, checked_at, state) VALUES (?, ?, ?)",
+                [(url, at, state) for url, (at, state) in self._checkpoints.items()])
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self._pending.clear()
+        self._checkpoints.clear()
+        return len(rows)
+
+    def evict_expired(self, now: float | None = None) -> int:
+        now = now or time.time()
+        self.dupes.prune(now)
+        expired = [r[0] for r in self._db.execute(
+            "SELECT job_id FROM seen WHERE expires_at < ?", (now,))]
+        if not expired:
+            return 0
+        if self._bloom is not None:
+            for job_id in expired:
+                self._bloom.add(job_id)
+            self._bloom.save(self._bloom_path)
+            self._rotate_bloom(now)
+            self._bloom_mtimes = (self._mtime(self._bloom_path), self._mtime(self._bloom_path + ".old"))
+        self._db.execute("DELETE FROM seen WHERE expires_at < ?", (now,))
+        return len(expired)
+
+    def migrate_from_text(self, path: str) -> int:
+        """One-time import of the old one-ID-per-line file, renamed to *.migrated afterwards."""
+        try:
+            with open(path, "r") as f:
+                ids = [line.strip() for line in f if line.strip()]
+        except FileNotFoundError:
+            return 0
+        for job_id in ids:
+            self.add(job_id)
+        self.flush()
+        os.replace(path, path + ".migrated")
+        return len(ids)
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+def load_seen(shared: bool = False) -> SeenStore:
+    store = SeenStore(SEEN_DB_PATH, shared=shared)
+    migrated = store.migrate_from_text(SEEN_JOBS_PATH)
+    if migrated:
+        log(f"   Migrated {migrated} job IDs from {SEEN_JOBS_PATH} into {SEEN_DB_PATH}.")
+    return store
+
+async def seen_evictor(seen_jobs: SeenStore):
+    while True:
+        await asyncio.sleep(SEEN_EVICT_INTERVAL)
+        try:
+            evicted = seen_jobs.evict_expired()
+            if evicted:
+                log(f"🧹 Evicted {evicted} expired job ID(s) from the seen store.")
+            if _outbox is not None:
+                _outbox.prune()
+        except Exception as e:
+            log(f"⚠️  Seen-store eviction error: {e}")
 
-async def _send_one(session: aiohttp.ClientSession, chat_id: str, msg: str):
-    api_url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
+# ================= TELEGRAM ================= #
+async def _send_one(session: aiohttp.ClientSession, chat_id: str, msg: str) -> str:
+    """Send one message: "sent", "failed" (worth retrying later) or "dead" (rejected for good)."""
+    api_url = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}/sendMessage"
     payload = {"chat_id": chat_id, "text": msg, "parse_mode": "HTML"}
     backoff = 5
     for attempt in range(5):
+        await _limiter.acquire("telegram", chat_id)
         try:
             async with session.post(api_url, data=payload, timeout=aiohttp.ClientTimeout(total=10)) as r:
                 if r.status == 200:
                     log(f"✅ Telegram sent → {chat_id}")
-                    return
+                    _limiter.relax("telegram", chat_id)
+                    return "sent"
                 elif r.status == 429:
                     body = await r.json()
                     wait = body.get("parameters", {}).get("retry_after", backoff)
                     log(f"⚠️  Telegram 429 (chat {chat_id}) — retry_after={wait}s")
-                    await asyncio.sleep(wait)
+                    _limiter.throttle("telegram", chat_id, wait)
                     backoff = max(backoff * 2, wait + 1)
                 else:
                     text = await r.text()
                     log(f"❌ Telegram HTTP {r.status} (chat {chat_id}): {text[:200]}")
-                    return
+                    return "failed" if r.status >= 500 else "dead"
         except asyncio.TimeoutError:
             log(f"❌ Telegram send timed out (attempt {attempt + 1}, chat {chat_id})")
             await asyncio.sleep(backoff)
@@ -474,19 +789,7 @@ async def _send_one(session: aiohttp.ClientSession, chat_id: str, msg: str):
             log(f"❌ Telegram exception (chat {chat_id}): {e}")
             await asyncio.sleep(backoff)
             backoff *= 2
-
-
-async def telegram_consumer():
-    async with aiohttp.ClientSession() as session:
-        while True:
-            item = await _tg_queue.get()
-            if item is None:
-                _tg_queue.task_done()
-                break
-            chat_id, msg = item
-            await _send_one(session, chat_id, msg)
-            _tg_queue.task_done()
-            await asyncio.sleep(TELEGRAM_SEND_INTERVAL)
+    return "failed"
 
 
 # ================= WHOP ================= #
@@ -497,27 +800,30 @@ def _html_to_whop_md(msg: str) -> str:
     text = re.sub(r"<[^>]+>", "", text)
     return text
 
-async def _send_whop(session: aiohttp.ClientSession, msg: str, channel_id: str = WHOP_CHANNEL_ID):
-    url = "https://api.whop.com/api/v1/messages"
+async def _send_whop(session: aiohttp.ClientSession, msg: str, channel_id: str = WHOP_CHANNEL_ID) -> str:
+    """As _send_one, for a Whop channel."""
+    url = f"{WHOP_API_BASE}/api/v1/messages"
     headers = {"Authorization": f"Bearer {WHOP_API_KEY}", "Content-Type": "application/json"}
     payload = {"content": _html_to_whop_md(msg), "channel_id": channel_id}
     backoff = 5
     for attempt in range(4):
+        await _limiter.acquire("whop", channel_id)
         try:
             async with session.post(url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as r:
                 if r.status in (200, 201):
                     log(f"✅ Whop sent → {channel_id}")
-                    return
+                    _limiter.relax("whop", channel_id)
+                    return "sent"
                 elif r.status == 429:
                     body = await r.json()
                     wait = body.get("retry_after", backoff)
                     log(f"⚠️  Whop 429 — retry_after={wait}s")
-                    await asyncio.sleep(wait)
+                    _limiter.throttle("whop", None, wait)   # Whop limits per API key
                     backoff = max(backoff * 2, wait + 1)
                 else:
                     text = await r.text()
                     log(f"❌ Whop HTTP {r.status}: {text[:200]}")
-                    return
+                    return "failed" if r.status >= 500 else "dead"
         except asyncio.TimeoutError:
             log(f"❌ Whop send timed out (attempt {attempt + 1})")
             await asyncio.sleep(backoff)
@@ -526,47 +832,752 @@ async def _send_whop(session: aiohttp.ClientSession, msg: str, channel_id: str =
             log(f"❌ Whop exception: {e}")
             await asyncio.sleep(backoff)
             backoff *= 2
+    return "failed"
+
+
+# ================= DELIVERY ================= #
+# Scrapers only write alerts to the outbox; each destination (a Telegram chat
+# or a Whop channel) has its own queue drained by its own workers over one
+# pooled session, so a slow or rate-limited API never holds up scraping or
+# the other destinations.
+DELIVERY_WORKERS = {"telegram": 1, "whop": 2}   # Telegram: one worker keeps per-chat order
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_RETRY_BASE   = 30      # seconds; doubles per failed attempt
+OUTBOX_RETRY_MAX    = 900
+OUTBOX_KEEP_SENT    = 7 * 86400
+LATENCY_REPORT_INTERVAL = 3600   # log time-to-alert percentiles over the last LATENCY_REPORT_WINDOW
+LATENCY_REPORT_WINDOW   = 86400
+# Once this many alerts are waiting for one destination, they go out packed
+# into digests (up to the API's message limit) until the backlog drains.
+COALESCE_BACKLOG    = 3
+MESSAGE_LIMITS      = {"telegram": 4096, "whop": 2000}   # Whop: conservative, undocumented
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    # nearest-rank
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+def destination_label(kind: str, target: str) -> str:
+    if kind == "telegram":
+        return {EARLY_CHAT_ID: "telegram:early", CHAT_ID: "telegram:group"}.get(target, f"telegram:{target}")
+    if target == WHOP_CHANNEL_ID:
+        return "whop:main"
+    for ch in SPECIALTY_CHANNELS:
+        if ch["whop_channel"] == target:
+            return f"whop:{ch['name']}"
+    return f"whop:{target}"
+
+class Outbox:
+    """
+    Durable queue of pending sends in the seen-jobs database: one row per
+    (job, destination) with its due time and attempt count, indexed on due
+    time. Delayed group/Whop sends are just rows with a later due_at, so a
+    crash or redeploy loses nothing; rows claimed but never confirmed are
+    put back on startup. Delivery is at-least-once, and the idempotency key
+    stops the same job being queued twice for a destination. Rows also keep
+    the job's timeline (published, first seen, enqueued, delivered) for
+    time-to-alert reporting.
+    """
+
+    def __init__(self, path: str = SEEN_DB_PATH):
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY, idem_key TEXT NOT NULL UNIQUE,"
+            " job_id TEXT NOT NULL, kind TEXT NOT NULL, target TEXT NOT NULL, msg TEXT NOT NULL,"
+            " due_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+            " status TEXT NOT NULL DEFAULT 'pending', created_at REAL NOT NULL, delivered_at REAL,"
+            " site TEXT, delay REAL NOT NULL DEFAULT 0, published_at REAL, first_seen REAL)"
+        )
+        cols = {row[1] for row in self._db.execute("PRAGMA table_info(outbox)")}
+        for col, decl in (("site", "TEXT"), ("delay", "REAL NOT NULL DEFAULT 0"),
+                          ("published_at", "REAL"), ("first_seen", "REAL")):
+            if col not in cols:
+                self._db.execute(f"ALTER TABLE outbox ADD COLUMN {col} {decl}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, due_at)")
+        self.wake = asyncio.Event()
+        self.poll: float | None = None   # also re-check this often when other processes add rows
+
+    def recover(self) -> int:
+        """Return rows left 'sending' by a previous run to the queue; returns how many are pending."""
+        self._db.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+        return self.pending()
+
+    def pending(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def outstanding(self) -> int:
+        """Rows not yet delivered or abandoned (pending or mid-send)."""
+        return self._db.execute(
+            "SELECT COUNT(*) FROM outbox WHERE status IN ('pending', 'sending')").fetchone()[0]
+
+    def pending_split(self, now: float) -> tuple[int, int]:
+        """(pending rows already due, pending rows held back until later, e.g. by EARLY_DELAY)."""
+        due, delayed = self._db.execute(
+            "SELECT COALESCE(SUM(due_at <= ?), 0), COALESCE(SUM(due_at > ?), 0)"
+            " FROM outbox WHERE status = 'pending'", (now, now)).fetchone()
+        return due, delayed
+
+    def put(self, job_id: str, sends: list[tuple[str, str, float]], msg: str, site: str = "",
+            published_at: float | None = None, first_seen: float | None = None, hold: float = 0) -> int:
+        """
+        Queue `msg` for each (kind, target, delay) in one transaction; returns
+        rows added. Sends due sooner than `hold` wait that long for a revised
+        message (see revise()); `delay` still records the intended delay.
+        """
+        now = time.time()
+        rows = [(f"{job_id}:{kind}:{target}", job_id, kind, target, msg, now + max(delay, hold), now,
+                 site, delay, published_at, first_seen or now)
+                for kind, target, delay in sends]
+        self._db.execute("BEGIN")
+        try:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO outbox (idem_key, job_id, kind, target, msg, due_at, created_at,"
+                " site, delay, published_at, first_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            added = self._db.total_changes - before
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self.wake.set()
+        return added
+
+    def claim_due(self, now: float, limit: int = 200) -> list[tuple]:
+        """Mark due rows 'sending' and return them as (id, kind, target, msg, attempts)."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._db.execute(
+                "SELECT id, kind, target, msg, attempts FROM outbox"
+                " WHERE status = 'pending' AND due_at <= ? ORDER BY due_at LIMIT ?", (now, limit)).fetchall()
+            self._db.executemany("UPDATE outbox SET status = 'sending' WHERE id = ?", [(r[0],) for r in rows])
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return rows
+
+    def revise(self, job_id: str, msg: str | None = None) -> int:
+        """
+        Swap `msg` (when given) into the job's rows that have not gone out yet
+        and release rows held by put(hold=...) at their intended due time.
+        Returns how many rows were updated.
+        """
+        cur = self._db.execute(
+            "UPDATE outbox SET msg = COALESCE(?, msg),"
+            " due_at = CASE WHEN attempts = 0 THEN MIN(due_at, MAX(created_at + delay, ?)) ELSE due_at END"
+            " WHERE job_id = ? AND status = 'pending'", (msg, time.time(), job_id))
+        self.wake.set()
+        return cur.rowcount
+
+    def next_due(self) -> float | None:
+        return self._db.execute(
+            "SELECT MIN(due_at) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def complete(self, row_id: int, result: str, attempts: int):
+        """Record a send attempt's result: "sent", "failed" (retried with backoff) or "dead"."""
+        now = time.time()
+        if result == "sent":
+            self._db.execute("UPDATE outbox SET status = 'sent', delivered_at = ? WHERE id = ?", (now, row_id))
+            row = self._db.execute(
+                "SELECT site, kind, target, first_seen FROM outbox WHERE id = ?", (row_id,)).fetchone()
+            if row and row[3]:
+                TIME_TO_ALERT.observe(now - row[3], row[0] or "?", destination_label(row[1], row[2]))
+            return
+        attempts += 1
+        if result == "dead" or attempts >= OUTBOX_MAX_ATTEMPTS:
+            self._db.execute("UPDATE outbox SET status = 'dead', attempts = ? WHERE id = ?", (attempts, row_id))
+            why = "rejected by the API" if result == "dead" else f"after {attempts} attempts"
+            log(f"❌ Outbox: giving up on send #{row_id} {why}")
+            return
+        retry_in = min(OUTBOX_RETRY_MAX, OUTBOX_RETRY_BASE * 2 ** (attempts - 1))
+        self._db.execute("UPDATE outbox SET status = 'pending', attempts = ?, due_at = ? WHERE id = ?",
+                         (attempts, now + retry_in, row_id))
+        self.wake.set()
+
+    def latency_report(self, since: float) -> list[tuple]:
+        """
+        Time-to-alert percentiles for rows delivered since `since`, grouped per
+        site and per destination: (group, label, n, stage, p50, p90, p99) for
+        each stage — published→delivered (day-granular, where the board shows
+        a date), first seen→delivered, and lateness beyond the intended delay
+        (how closely EARLY_DELAY is honoured).
+        """
+        rows = self._db.execute(
+            "SELECT site, kind, target, published_at, first_seen, created_at, delay, delivered_at"
+            " FROM outbox WHERE status = 'sent' AND delivered_at >= ?", (since,)).fetchall()
+        groups: dict[tuple, dict[str, list[float]]] = {}
+        for site, kind, target, published, first_seen, created, delay, delivered in rows:
+            for key in (("site", site or "?"), ("destination", destination_label(kind, target))):
+                stages = groups.setdefault(key, {"published": [], "first_seen": [], "late": []})
+                if published:
+                    stages["published"].append(delivered - published)
+                stages["first_seen"].append(delivered - (first_seen or created))
+                stages["late"].append(delivered - created - (delay or 0))
+        report = []
+        for (group, label), stages in sorted(groups.items()):
+            for stage, values in stages.items():
+                if values:
+                    values.sort()
+                    report.append((group, label, len(values), stage,
+                                   _percentile(values, 50), _percentile(values, 90), _percentile(values, 99)))
+        return report
+
+    def prune(self, now: float | None = None) -> int:
+        """Drop delivered/abandoned rows older than OUTBOX_KEEP_SENT."""
+        cutoff = (now or time.time()) - OUTBOX_KEEP_SENT
+        cur = self._db.execute(
+            "DELETE FROM outbox WHERE status IN ('sent', 'dead') AND created_at < ?", (cutoff,))
+        return cur.rowcount
+
+    def close(self):
+        self._db.close()
+
+class TokenBucket:
+    """`rate` tokens per second up to `burst`. throttle() honours a server retry_after
+    and halves the rate; relax() creeps it back after successful sends."""
+
+    def __init__(self, rate: float, burst: int):
+        self.base_rate = self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+        self.blocked_until = 0.0
+
+    def delay(self, now: float, tokens: bool = True) -> float:
+        """Seconds until a send may go out (0 = now). tokens=False only honours retry_after."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        wait = max(0.0, self.blocked_until - now)
+        if tokens and self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def take(self):
+        self.tokens -= 1
+
+    def throttle(self, retry_after: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+        self.rate = max(self.base_rate / 8, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+
+    def relax(self):
+        self.rate = min(self.base_rate, self.rate * 1.1)
+
+class RateLimiter:
+    """
+    A bucket per destination plus a global bucket per API, so destinations send
+    in parallel up to the API-wide limit. Priority destinations (the early
+    chat) still count against the global bucket but never wait for its tokens,
+    so they cannot queue behind a group or Whop backlog. `rates` pins the
+    bucket of specific destinations.
+    """
+
+    def __init__(self, priority: set[tuple] = frozenset(), rates: dict[tuple, tuple] | None = None):
+        self.priority = set(priority)
+        self.rates = dict(rates or {})   # (kind, target) → (rate, burst), overriding the defaults below
+        self._global = {"telegram": TokenBucket(*TG_GLOBAL_RATE), "whop": TokenBucket(*WHOP_GLOBAL_RATE)}
+        self._buckets: dict[tuple, TokenBucket] = {}
+
+    def _bucket(self, kind: str, target: str | None) -> TokenBucket:
+        if target is None:
+            return self._global[kind]
+        b = self._buckets.get((kind, target))
+        if b is None:
+            if (kind, target) in self.rates:
+                rate = self.rates[(kind, target)]
+            elif kind == "telegram":
+                # negative IDs are groups/channels, which Telegram limits per minute
+                rate = TG_GROUP_RATE if str(target).startswith("-") else TG_CHAT_RATE
+            else:
+                rate = WHOP_CHANNEL_RATE
+            b = self._buckets[(kind, target)] = TokenBucket(*rate)
+        return b
+
+    async def acquire(self, kind: str, target: str):
+        own, glob = self._bucket(kind, target), self._global[kind]
+        urgent = (kind, target) in self.priority
+        while True:
+            now = time.monotonic()
+            wait = max(own.delay(now), glob.delay(now, tokens=not urgent))
+            if wait <= 0:
+                own.take()
+                glob.take()
+                return
+            await asyncio.sleep(wait)
+
+    def throttle(self, kind: str, target: str | None, retry_after: float):
+        self._bucket(kind, target).throttle(retry_after)
+
+    def relax(self, kind: str, target: str):
+        self._bucket(kind, target).relax()
+        self._global[kind].relax()
+
+def make_limiter() -> RateLimiter:
+    return RateLimiter(priority={("telegram", EARLY_CHAT_ID)},
+                       rates={("telegram", EARLY_CHAT_ID): EARLY_CHAT_RATE})
+
+_limiter = make_limiter()
+_outbox: Outbox | None = None
+_api_session: aiohttp.ClientSession | None = None
+_dest_queues: dict[tuple, asyncio.Queue] = {}
+_dest_workers: list[asyncio.Task] = []
+
+def _get_api_session() -> aiohttp.ClientSession:
+    global _api_session
+    if _api_session is None or _api_session.closed:
+        _api_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=20, limit_per_host=10,
+                                           keepalive_timeout=120, ttl_dns_cache=600),
+        )
+    return _api_session
+
+def _message_length(kind: str, msg: str) -> int:
+    return len(_html_to_whop_md(msg)) if kind == "whop" else len(msg)
+
+def build_digest(kind: str, msgs: list[str]) -> str:
+    if len(msgs) == 1:
+        return msgs[0]
+    return f"📦 <b>{len(msgs)} new jobs</b>\n\n" + "\n\n".join(msgs)
+
+def _take_batch(kind: str, first: tuple, q: asyncio.Queue) -> tuple[list[tuple], tuple | None]:
+    """
+    Pull queued items after `first` while the digest stays within the API's
+    message limit. Returns the batch and the first item that did not fit
+    (to be sent next), if any.
+    """
+    batch, msgs = [first], [first[1]]
+    limit = MESSAGE_LIMITS[kind]
+    while not q.empty():
+        item = q.get_nowait()
+        if _message_length(kind, build_digest(kind, msgs + [item[1]])) > limit:
+            return batch, item
+        batch.append(item)
+        msgs.append(item[1])
+    return batch, None
+
+async def _delivery_worker(dest: tuple, q: asyncio.Queue):
+    kind, target = dest
+    held = None
+    solo: deque = deque()   # rows of a digest that was not sent, retried one message each
+    while True:
+        if solo:
+            batch = [solo.popleft()]
+        else:
+            first, held = held or await q.get(), None
+            if q.qsize() + 1 >= COALESCE_BACKLOG:
+                batch, held = _take_batch(kind, first, q)
+            else:
+                batch = [first]
+        msg = build_digest(kind, [m for _, m, _ in batch])
+        result = "failed"
+        t0 = time.perf_counter()
+        try:
+            if kind == "telegram":
+                result = await _send_one(_get_api_session(), target, msg)
+            else:
+                result = await _send_whop(_get_api_session(), msg, channel_id=target)
+            if result == "sent" and len(batch) > 1:
+                log(f"📦 Digest of {len(batch)} alerts → {kind} {target}")
+        except Exception as e:
+            log(f"❌ Delivery worker error ({kind} {target}): {e}")
+        finally:
+            DELIVERY_SECONDS.observe(time.perf_counter() - t0, kind)
+            DELIVERIES.inc(kind, result)
+            if result != "sent" and len(batch) > 1:
+                # One bad entry (or a digest over the API's real limit) must not take the rest down
+                log(f"📦 Digest of {len(batch)} alerts → {kind} {target} {result} — sending them one by one.")
+                solo.extend(batch)
+            else:
+                for row_id, _, attempts in batch:
+                    _outbox.complete(row_id, result, attempts)
+                    q.task_done()
+
+def _queue_for(dest: tuple) -> asyncio.Queue:
+    q = _dest_queues.get(dest)
+    if q is None:
+        q = _dest_queues[dest] = asyncio.Queue()
+        for _ in range(DELIVERY_WORKERS[dest[0]]):
+            _dest_workers.append(asyncio.create_task(_delivery_worker(dest, q)))
+    return q
+
+async def outbox_dispatcher(outbox: Outbox):
+    """Hand due outbox rows to their destination's workers, sleeping until the next due time."""
+    while True:
+        outbox.wake.clear()
+        try:
+            for row_id, kind, target, msg, attempts in outbox.claim_due(time.time()):
+                _queue_for((kind, target)).put_nowait((row_id, msg, attempts))
+            nxt = outbox.next_due()
+        except Exception as e:
+            log(f"⚠️  Outbox dispatcher error: {e}")
+            nxt = time.time() + 5
+        timeout = None if nxt is None else max(0.0, nxt - time.time())
+        if outbox.poll:
+            timeout = outbox.poll if timeout is None else min(timeout, outbox.poll)
+        try:
+            await asyncio.wait_for(outbox.wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+def dispatch_alert(job_id: str, msg: str, goes_early: bool, goes_chat: bool,
+                   specialty_channels: list, job: dict | None = None, hold: float = 0) -> list[str]:
+    """
+    Queue one alert for every destination it is routed to. Returns labels for
+    the log line. `hold` keeps immediate sends back for enrichment; it never
+    applies to the early chat, whose other sends wait EARLY_DELAY anyway.
+    """
+    destinations, sends = [], []
+    if goes_early:
+        destinations.append("early+group+Whop(delayed)")
+        sends += [("telegram", EARLY_CHAT_ID, 0),
+                  ("telegram", CHAT_ID, EARLY_DELAY),
+                  ("whop", WHOP_CHANNEL_ID, EARLY_DELAY)]
+        for ch in specialty_channels:
+            destinations.append(f"{ch['name']}(delayed)")
+            sends.append(("whop", ch["whop_channel"], EARLY_DELAY))
+    else:
+        if goes_chat:
+            destinations.append("group+Whop")
+            sends += [("telegram", CHAT_ID, 0), ("whop", WHOP_CHANNEL_ID, 0)]
+        for ch in specialty_channels:
+            destinations.append(ch["name"])
+            sends.append(("whop", ch["whop_channel"], 0))
+    if sends:
+        job = job or {}
+        _outbox.put(job_id, sends, msg, site=job.get("site", ""),
+                    published_at=publication_time(job), first_seen=job.get("first_seen"),
+                    hold=0 if goes_early else hold)
+    return destinations
+
+async def latency_reporter(outbox: Outbox):
+    while True:
+        await asyncio.sleep(LATENCY_REPORT_INTERVAL)
+        try:
+            report = outbox.latency_report(time.time() - LATENCY_REPORT_WINDOW)
+        except Exception as e:
+            log(f"⚠️  Latency report error: {e}")
+            continue
+        if not report:
+            continue
+        log(f"⏱️  Time-to-alert, last {LATENCY_REPORT_WINDOW // 3600}h (p50 / p90 / p99 seconds):")
+        for group, label, n, stage, p50, p90, p99 in report:
+            log(f"   {group:<11} {label:<28} {stage:<10} n={n:<5} {p50:>8.0f} {p90:>8.0f} {p99:>8.0f}")
 
+def _delivery_gauges() -> list[tuple]:
+    gauges = [("nhsbot_delivery_queue_depth", "Messages handed to a destination's workers, not yet sent",
+               ("kind", "target"), [(dest, q.qsize()) for dest, q in _dest_queues.items()])]
+    if _outbox is not None:
+        due, delayed = _outbox.pending_split(time.time())
+        gauges.append(("nhsbot_outbox_pending", "Undelivered outbox rows", ("state",),
+                       [("due", due), ("delayed", delayed)]))
+    return gauges
 
-async def _schedule_group_send(msg: str, specialty_channels: list = None):
-    """Wait EARLY_DELAY then send to Telegram group + main Whop channel + any specialty channels."""
-    await asyncio.sleep(EARLY_DELAY)
-    _tg_queue.put_nowait((CHAT_ID, msg))
-    async with aiohttp.ClientSession() as session:
-        await _send_whop(session, msg, channel_id=WHOP_CHANNEL_ID)
-        for ch in (specialty_channels or []):
-            await _send_whop(session, msg, channel_id=ch["whop_channel"])
+_gauges.append(_delivery_gauges)
+
+async def close_delivery():
+    for t in _dest_workers:
+        t.cancel()
+    if _api_session is not None and not _api_session.closed:
+        await _api_session.close()
 
 
 # ================= FILTER LOGIC ================= #
-def relevant_for_chat(title: str) -> bool:
-    t = title.lower()
-    if any(ex in t for ex in CHAT_EXCLUDE_KEYWORDS):
-        return False
-    if not any(_word_match(sp, t) for sp in CHAT_SPECIALTIES):
-        return False
-    return True
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
 
-def relevant_for_early(title: str) -> bool:
-    t = title.lower()
-    if any(ex in t for ex in EARLY_EXCLUDE_KEYWORDS):
-        return False
-    if not any(_word_match(sp, t) for sp in EARLY_SPECIALTIES):
-        return False
-    if not any(gr in t for gr in EARLY_GRADE_KEYWORDS):
+class FilterEngine:
+    """
+    Every keyword list (chat, early and each specialty channel) compiled into
+    one Aho-Corasick automaton. A title is scanned once; each keyword hit ORs
+    the bits of the rules it belongs to, and the routing decision is read off
+    the resulting bitmask.
+
+    Exclude and grade keywords are plain substring matches (as `ex in t`);
+    specialty keywords also need word boundaries at both ends (as r'\\bkw\\b').
+    """
+
+    def __init__(self, chat_specialties, chat_excludes, early_specialties,
+                 early_grades, early_excludes, channels):
+        self.channels = list(channels)
+        self._sub_masks: list[int]  = []   # per pattern: bits set on any hit
+        self._word_masks: list[int] = []   # per pattern: bits set on a whole-word hit
+        self._lengths: list[int]    = []
+        self._pattern_ids: dict     = {}
+        self._goto: list[dict]      = [{}]
+        self._fail: list[int]       = [0]
+        self._out: list[list[int]]  = [[]]
+
+        self._bit = itertools.count()
+        self._rule_bits: dict[tuple, int] = {}
+        self.CHAT_SP  = self._rule(chat_specialties,  word=True)
+        self.CHAT_EX  = self._rule(chat_excludes,     word=False)
+        self.EARLY_SP = self._rule(early_specialties, word=True)
+        self.EARLY_EX = self._rule(early_excludes,    word=False)
+        self.EARLY_GR = self._rule(early_grades,      word=False)
+        self._channel_bits: list[tuple[int, int]] = [
+            (self._rule(ch["specialties"], word=True), self._rule(ch["excludes"], word=False))
+            for ch in self.channels
+        ]
+        self._build_failure_links()
+
+    def _rule(self, keywords, word: bool) -> int:
+        """Bit for one keyword rule; rules with the same keyword set (e.g. the
+        shared exclude list on most channels) share a single bit."""
+        key = (word, frozenset(kw.lower() for kw in keywords if kw))
+        mask = self._rule_bits.get(key)
+        if mask is None:
+            mask = self._rule_bits[key] = 1 << next(self._bit)
+            self._add_all(keywords, mask, word)
+        return mask
+
+    def _add_all(self, keywords, mask: int, word: bool):
+        for kw in keywords:
+            kw = kw.lower()
+            if not kw:
+                continue
+            pid = self._pattern_ids.get(kw)
+            if pid is None:
+                pid = self._insert(kw)
+            if word:
+                self._word_masks[pid] |= mask
+            else:
+                self._sub_masks[pid] |= mask
+
+    def _insert(self, kw: str) -> int:
+        state = 0
+        for c in kw:
+            nxt = self._goto[state].get(c)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][c] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        pid = len(self._lengths)
+        self._pattern_ids[kw] = pid
+        self._lengths.append(len(kw))
+        self._sub_masks.append(0)
+        self._word_masks.append(0)
+        self._out[state].append(pid)
+        return pid
+
+    def _build_failure_links(self):
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for c, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and c not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(c, 0)
+                # Outputs of the failure state are also outputs here
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> int:
+        """Bitmask of every rule with at least one keyword hit in `text` (lower-cased)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        sub_masks, word_masks, lengths = self._sub_masks, self._word_masks, self._lengths
+        n = len(text)
+        mask = state = 0
+        for i, c in enumerate(text):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            for pid in out[state]:
+                mask |= sub_masks[pid]
+                wm = word_masks[pid]
+                if wm and wm & ~mask:
+                    start = i + 1 - lengths[pid]
+                    left  = start > 0 and _is_word_char(text[start - 1])
+                    right = i + 1 < n and _is_word_char(text[i + 1])
+                    if left != _is_word_char(text[start]) and right != _is_word_char(c):
+                        mask |= wm
+        return mask
+
+    def route(self, title: str) -> tuple[bool, bool, list]:
+        """Full routing decision for one title: (goes_early, goes_chat, matched specialty channels)."""
+        m = self.scan(title.lower())
+        goes_early = bool(m & self.EARLY_SP and m & self.EARLY_GR and not m & self.EARLY_EX)
+        goes_chat  = bool(m & self.CHAT_SP and not m & self.CHAT_EX)
+        matched = [ch for ch, (sp, ex) in zip(self.channels, self._channel_bits)
+                   if m & sp and not m & ex]
+        return goes_early, goes_chat, matched
+
+# ================= FILTER CONFIG ================= #
+_CHANNEL_KEYS = {"name", "whop_channel", "urls", "specialties", "excludes"}
+
+def _keywords(value, lists: dict, where: str) -> tuple:
+    """A keyword list with '@name' entries replaced by lists[name], lower-cased and de-duplicated.
+    A list that is exactly one reference comes back as the shared tuple itself."""
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        raise ValueError(f"{where}: expected a list of keywords")
+    if len(value) == 1 and isinstance(value[0], str) and value[0].startswith("@"):
+        if value[0][1:] not in lists:
+            raise ValueError(f"{where}: unknown list {value[0]!r}")
+        return lists[value[0][1:]]
+    out = []
+    for kw in value:
+        if not isinstance(kw, str) or not kw.strip():
+            raise ValueError(f"{where}: keywords must be non-empty strings, got {kw!r}")
+        if kw.startswith("@"):
+            if kw[1:] not in lists:
+                raise ValueError(f"{where}: unknown list {kw!r}")
+            out.extend(lists[kw[1:]])
+        else:
+            out.append(kw.lower())
+    return tuple(dict.fromkeys(out))
+
+def _urls(value, where: str) -> list[str]:
+    if not isinstance(value, list) or not all(isinstance(u, str) and u.startswith(("http://", "https://"))
+                                              for u in value):
+        raise ValueError(f"{where}: expected a list of http(s) URLs")
+    return list(dict.fromkeys(value))
+
+def _section(cfg: dict, name: str, keys: set, where: str) -> dict:
+    sec = cfg.get(name)
+    if not isinstance(sec, dict):
+        raise ValueError(f"{where}: missing '{name}' section")
+    unknown = {k for k in sec if not k.startswith("_")} - keys
+    missing = keys - set(sec)
+    if unknown or missing:
+        raise ValueError(f"{where}.{name}: unknown keys {sorted(unknown)}, missing {sorted(missing)}")
+    return sec
+
+def load_filter_config(path: str = FILTERS_PATH) -> dict:
+    """
+    Read and validate the filter file, expanding '@name' references to the
+    shared lists. Returns the compiled config: urls, chat/early keyword
+    tuples, channels and the FilterEngine built from them. Raises ValueError
+    (or OSError) on a bad file.
+    """
+    with open(path, encoding="utf-8") as f:
+        try:
+            cfg = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: {e}") from None
+    if not isinstance(cfg, dict):
+        raise ValueError(f"{path}: expected a JSON object")
+    unknown = {k for k in cfg if not k.startswith("_")} - {"lists", "urls", "chat", "early", "channels"}
+    if unknown:
+        raise ValueError(f"{path}: unknown keys {sorted(unknown)}")
+
+    lists: dict[str, tuple] = {}
+    for name, value in (cfg.get("lists") or {}).items():
+        lists[name] = _keywords(value, lists, f"{path}: lists.{name}")
+
+    chat  = _section(cfg, "chat",  {"specialties", "excludes"}, path)
+    early = _section(cfg, "early", {"specialties", "grades", "excludes"}, path)
+    channels, names, feeds = [], set(), set()
+    for i, ch in enumerate(cfg.get("channels") or []):
+        where = f"{path}: channels[{i}]"
+        if not isinstance(ch, dict) or _CHANNEL_KEYS - set(ch) or {k for k in ch if not k.startswith("_")} - _CHANNEL_KEYS:
+            raise ValueError(f"{where}: needs exactly {sorted(_CHANNEL_KEYS)}")
+        if ch["name"] in names or ch["whop_channel"] in feeds:
+            raise ValueError(f"{where}: duplicate name or whop_channel")
+        names.add(ch["name"])
+        feeds.add(ch["whop_channel"])
+        channels.append({
+            "name": ch["name"], "whop_channel": ch["whop_channel"],
+            "urls": _urls(ch["urls"], f"{where}.urls"),
+            "specialties": _keywords(ch["specialties"], lists, f"{where}.specialties"),
+            "excludes": _keywords(ch["excludes"], lists, f"{where}.excludes"),
+        })
+
+    compiled = {
+        "urls": _urls(cfg.get("urls", []), f"{path}: urls"),
+        "chat_specialties":  _keywords(chat["specialties"], lists, f"{path}: chat.specialties"),
+        "chat_excludes":     _keywords(chat["excludes"], lists, f"{path}: chat.excludes"),
+        "early_specialties": _keywords(early["specialties"], lists, f"{path}: early.specialties"),
+        "early_grades":      _keywords(early["grades"], lists, f"{path}: early.grades"),
+        "early_excludes":    _keywords(early["excludes"], lists, f"{path}: early.excludes"),
+        "channels": channels,
+    }
+    compiled["digest"] = hashlib.blake2b(
+        json.dumps([compiled[k] for k in sorted(compiled)]).encode(), digest_size=8).hexdigest()
+    compiled["engine"] = FilterEngine(
+        compiled["chat_specialties"], compiled["chat_excludes"],
+        compiled["early_specialties"], compiled["early_grades"], compiled["early_excludes"],
+        channels,
+    )
+    return compiled
+
+def apply_filter_config(compiled: dict):
+    """Swap in a compiled config. Each name is rebound in one step, so a scrape
+    in flight sees either the old rules or the new ones."""
+    global URLS, CHAT_SPECIALTIES, CHAT_EXCLUDE_KEYWORDS, SPECIALTY_CHANNELS, _FILTERS
+    global EARLY_SPECIALTIES, EARLY_GRADE_KEYWORDS, EARLY_EXCLUDE_KEYWORDS, _filters_digest
+    URLS                   = compiled["urls"]
+    CHAT_SPECIALTIES       = compiled["chat_specialties"]
+    CHAT_EXCLUDE_KEYWORDS  = compiled["chat_excludes"]
+    EARLY_SPECIALTIES      = compiled["early_specialties"]
+    EARLY_GRADE_KEYWORDS   = compiled["early_grades"]
+    EARLY_EXCLUDE_KEYWORDS = compiled["early_excludes"]
+    SPECIALTY_CHANNELS     = compiled["channels"]
+    _FILTERS               = compiled["engine"]
+    _filters_digest        = compiled["digest"]
+
+apply_filter_config(load_filter_config())
+_filters_mtime = os.stat(FILTERS_PATH).st_mtime
+_filters_reload = asyncio.Event()   # set by SIGHUP
+
+def reload_filter_config(on_urls_changed=None) -> bool:
+    """Re-read FILTERS_PATH; on a bad file keep the current rules. Returns whether anything was applied."""
+    global _filters_mtime
+    try:
+        _filters_mtime = os.stat(FILTERS_PATH).st_mtime
+        compiled = load_filter_config(FILTERS_PATH)
+    except (OSError, ValueError) as e:
+        log(f"⚠️  Filter config not reloaded, keeping current rules: {e}")
         return False
+    old_urls = set(all_urls())
+    apply_filter_config(compiled)
+    new_urls = set(all_urls())
+    # Listings whose job IDs haven't changed would skip filtering; forget them so
+    # jobs the old rules passed over get judged by the new ones
+    _fingerprints.clear()
+    log(f"🔁 Filter config reloaded: {len(new_urls)} URLs (+{len(new_urls - old_urls)} / "
+        f"-{len(old_urls - new_urls)}), {len(SPECIALTY_CHANNELS)} specialty channels.")
+    if on_urls_changed and new_urls != old_urls:
+        on_urls_changed(all_urls())
     return True
 
-def _word_match(keyword: str, text: str) -> bool:
-    return bool(re.search(r'\b' + re.escape(keyword) + r'\b', text))
+async def filter_config_watcher(on_urls_changed=None):
+    """Reload on SIGHUP or when the file's mtime changes."""
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, _filters_reload.set)
+    except (NotImplementedError, AttributeError, RuntimeError):
+        pass
+    while True:
+        try:
+            await asyncio.wait_for(_filters_reload.wait(), FILTERS_RELOAD_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        signalled = _filters_reload.is_set()
+        _filters_reload.clear()
+        try:
+            changed = os.stat(FILTERS_PATH).st_mtime != _filters_mtime
+        except OSError:
+            changed = False
+        if signalled or changed:
+            reload_filter_config(on_urls_changed)
+
+def route_job(title: str) -> tuple[bool, bool, list]:
+    return _FILTERS.route(title)
+
+def relevant_for_chat(title: str) -> bool:
+    return _FILTERS.route(title)[1]
+
+def relevant_for_early(title: str) -> bool:
+    return _FILTERS.route(title)[0]
 
 def relevant_for_specialty(title: str, ch: dict) -> bool:
-    t = title.lower()
-    if any(ex in t for ex in ch["excludes"]):
-        return False
-    if not any(_word_match(sp, t) for sp in ch["specialties"]):
-        return False
-    return True
+    return any(c is ch for c in _FILTERS.route(title)[2])
 
 def extract_job_id(link: str) -> str:
     m = re.search(r"\d{4,}", link)
@@ -590,6 +1601,18 @@ def sel_txt(parent, selector: str) -> str:
     el = parent.select_one(selector)
     return txt(el) if el else ""
 
+def index_by(parent, attr: str = "class", name=True) -> dict:
+    """
+    First descendant of `parent` for each value of `attr` (each class, for
+    "class"). One tree walk per card instead of one CSS select_one per field.
+    """
+    index: dict = {}
+    for el in parent.find_all(name, attrs={attr: True}):
+        values = el.get(attr)
+        for v in (values if isinstance(values, list) else [values]):
+            index.setdefault(v, el)
+    return index
+
 # ================= HUMAN-LIKE HELPERS ================= #
 async def human_scroll(page):
     try:
@@ -639,42 +1662,300 @@ async def new_context(browser):
     """)
     return ctx
 
+# ================= REQUEST BLOCKING ================= #
+# Requests aborted before they leave Chromium: heavy resource types plus
+# analytics/ad domains. ALLOW_DOMAINS always pass (anti-bot challenges must
+# load). SITE_BLOCKING overrides per site, matched like HTTP_FETCH_SITES.
+BLOCK_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+BLOCK_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "googleadservices.com", "adservice.google.com", "facebook.net", "facebook.com",
+    "connect.facebook.net", "hotjar.com", "clarity.ms", "bat.bing.com", "linkedin.com",
+    "licdn.com", "twitter.com", "ads-twitter.com", "youtube.com", "ytimg.com", "newrelic.com",
+    "nr-data.net", "scorecardresearch.com", "quantserve.com", "addthis.com", "sharethis.com",
+    "tiktok.com", "siteimproveanalytics.com", "siteimprove.com", "cookielaw.org", "onetrust.com",
+]
+ALLOW_DOMAINS = [
+    "challenges.cloudflare.com", "hcaptcha.com", "recaptcha.net",
+    "google.com/recaptcha", "gstatic.com/recaptcha",
+]
+SITE_BLOCKING = {
+    # Keep stylesheets: the NHS Jobs results list is lazily laid out
+    "jobs.nhs.uk": {"types": {"image", "media", "font"}},
+}
+# Rough transfer size of a blocked request, for the "bytes saved" estimate
+_BLOCKED_BYTES_ESTIMATE = {"image": 40_000, "media": 250_000, "font": 45_000,
+                           "stylesheet": 30_000, "script": 60_000}
+
+def blocking_rules(url: str) -> tuple[set, list, list]:
+    rules = next((r for site, r in SITE_BLOCKING.items() if site in url), {})
+    return (rules.get("types", BLOCK_RESOURCE_TYPES),
+            BLOCK_DOMAINS + rules.get("domains", []),
+            ALLOW_DOMAINS + rules.get("allow", []))
+
+def _host_matches(host: str, domains: list) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+async def install_request_blocking(ctx, url: str) -> dict:
+    """Route every request of `ctx` through the blocklist; returns the live counters."""
+    types, domains, allow = blocking_rules(url)
+    stats = {"blocked": 0, "bytes_saved": 0, "allowed": 0}
+
+    async def handler(route):
+        req = route.request
+        try:
+            if not any(a in req.url for a in allow) and (
+                    req.resource_type in types
+                    or _host_matches(urlsplit(req.url).hostname or "", domains)):
+                stats["blocked"] += 1
+                stats["bytes_saved"] += _BLOCKED_BYTES_ESTIMATE.get(req.resource_type, 10_000)
+                await route.abort("blockedbyclient")
+                return
+            stats["allowed"] += 1
+            await route.continue_()
+        except Exception:
+            pass   # page already closed
+
+    await ctx.route("**/*", handler)
+    return stats
+
 # ================= GOTO WITH RETRY ================= #
 _WAIT_STRATEGIES = ["domcontentloaded", "commit"]
+_last_status: dict[str, int] = {}   # url → HTTP status of its last navigation (0 = no response)
 
 async def goto_with_retry(page, url: str, retries: int = 2, timeout: int = PAGE_TIMEOUT) -> bool:
+    with STAGE_SECONDS.time("navigate", url):
+        return await _goto_with_retry(page, url, retries, timeout)
+
+async def _goto_with_retry(page, url: str, retries: int, timeout: int) -> bool:
+    _last_status[url] = 0
     for attempt in range(1, retries + 1):
         strategy = _WAIT_STRATEGIES[min(attempt - 1, len(_WAIT_STRATEGIES) - 1)]
         try:
             resp = await page.goto(url, wait_until=strategy, timeout=timeout)
+            if resp:
+                _last_status[url] = resp.status
             if resp and resp.status == 200:
                 return True
             if resp and resp.status == 403:
+                NAV_ERRORS.inc(url, "403")
                 log(f"⛔ 403 on {url[:70]} (attempt {attempt}).")
                 await asyncio.sleep(2)
             elif resp:
+                NAV_ERRORS.inc(url, "http")
                 log(f"⚠️  HTTP {resp.status} on {url[:70]} (attempt {attempt}).")
                 return False
         except PWTimeout:
+            NAV_ERRORS.inc(url, "timeout")
             log(f"⏱️  Timeout [{strategy}] on {url[:70]} (attempt {attempt}).")
             await asyncio.sleep(2)
         except Exception as e:
+            NAV_ERRORS.inc(url, "error")
             log(f"❌ Nav error {url[:70]}: {e} (attempt {attempt}).")
             await asyncio.sleep(2)
     return False
 
+# ================= WARM CONTEXT POOL ================= #
+def site_key(url: str) -> str:
+    return urlsplit(url).hostname or url
+
+class ContextPool:
+    """
+    Pre-warmed, stealth-applied (context, page) leases kept per site, so
+    new_context / add_init_script / stealth_async are paid once per
+    CONTEXT_MAX_USES scrapes rather than on every URL. A context is retired
+    (and its UA/viewport rotated by the replacement) after CONTEXT_MAX_USES
+    uses, on a 403 or on a failed health check; replacements are warmed in the
+    background. Callers hold a _ctx_sem slot while a lease is in use.
+    """
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed  = False
+        self._idle: dict[str, list[dict]] = {}
+
+    async def _create(self, url: str) -> dict:
+        ctx = await new_context(self.browser)
+        try:
+            blocked = await install_request_blocking(ctx, url)
+            page = await ctx.new_page()
+            await stealth_async(page)
+        except Exception:
+            await ctx.close()
+            raise
+        return {"site": site_key(url), "url": url, "ctx": ctx, "page": page,
+                "uses": 0, "blocked": blocked}
+
+    async def _healthy(self, lease: dict) -> bool:
+        if lease["page"].is_closed():
+            return False
+        try:
+            await asyncio.wait_for(lease["page"].evaluate("1"), timeout=5)
+            return True
+        except Exception:
+            return False
+
+    async def _discard(self, lease: dict):
+        try:
+            await lease["ctx"].close()
+        except Exception:
+            pass
+
+    async def acquire(self, url: str) -> dict:
+        idle = self._idle.setdefault(site_key(url), [])
+        while idle:
+            lease = idle.pop()
+            if await self._healthy(lease):
+                for k in lease["blocked"]:
+                    lease["blocked"][k] = 0
+                return lease
+            await self._discard(lease)
+        return await self._create(url)
+
+    async def release(self, lease: dict, retire: bool = False):
+        lease["uses"] += 1
+        idle = self._idle.setdefault(lease["site"], [])
+        if not retire and lease["uses"] < CONTEXT_MAX_USES and not self.closed and len(idle) < CONTEXT_POOL_IDLE:
+            try:
+                await lease["page"].goto("about:blank", timeout=5_000)
+                idle.append(lease)
+                return
+            except Exception:
+                pass
+        await self._discard(lease)
+        if not self.closed:
+            asyncio.create_task(self.prewarm([lease["url"]]))
+
+    async def prewarm(self, urls: list[str]):
+        """Fill each site's idle slot ahead of its next scrape, one context at a time."""
+        for url in dict.fromkeys(urls):
+            if self.closed or self._idle.get(site_key(url)):
+                continue
+            try:
+                async with _ctx_sem:
+                    if self.closed or self._idle.get(site_key(url)):
+                        continue
+                    lease = await self._create(url)
+                    if self.closed:   # close() ran while the context was being created
+                        await self._discard(lease)
+                        return
+                    self._idle.setdefault(site_key(url), []).append(lease)
+            except Exception as e:
+                log(f"⚠️  Could not pre-warm a context for {site_key(url)}: {e}")
+
+    async def close(self):
+        self.closed = True
+        for idle in self._idle.values():
+            while idle:
+                await self._discard(idle.pop())
+
+# ================= BROWSER WATCHDOG ================= #
+_MB = 1 << 20
+
+class BrowserWatchdog:
+    """
+    Samples this process's RSS, the RSS of its child tree (Playwright driver
+    and Chromium) and the browser's open contexts and pages every
+    WATCHDOG_INTERVAL. Crossing a limit sets `tripped`; the caller then
+    stops starting scrapes, lets in-flight ones finish and recycles. A
+    disconnected browser (crash, OOM kill) trips it at once. Python's own
+    RSS does not come back with a new browser, so that trigger ends the
+    process instead (see main()) and the supervisor's restart resumes from
+    the checkpoints.
+    """
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.trigger = self.reason = ""
+        self.tripped = asyncio.Event()
+        self.sample = self.measure()
+        self._stopped = False
+        browser.on("disconnected", self._on_disconnected)
+        self._task = asyncio.create_task(self._watch())
+
+    def _on_disconnected(self, _browser):
+        # browser.close() fires this too; only a disconnect nobody asked for counts
+        if not self._stopped:
+            self.trip("disconnected", "browser disconnected")
+
+    def measure(self) -> dict:
+        own, tree = process_tree_rss()
+        try:
+            contexts = list(self.browser.contexts)
+            pages = sum(len(ctx.pages) for ctx in contexts)
+        except Exception:
+            contexts, pages = [], 0
+        return {"python": own, "browser": tree, "contexts": len(contexts), "pages": pages}
+
+    def trip(self, trigger: str, reason: str):
+        if not self.tripped.is_set():
+            self.trigger, self.reason = trigger, reason
+            log(f"🐕 Watchdog: {reason} — recycling the browser once in-flight scrapes finish.")
+            self.tripped.set()
+
+    async def _watch(self):
+        while not self.tripped.is_set():
+            await asyncio.sleep(WATCHDOG_INTERVAL)
+            s = self.sample = self.measure()
+            if s["browser"] > BROWSER_RSS_LIMIT_MB * _MB:
+                self.trip("browser_memory", f"browser RSS {s['browser'] // _MB} MB > {BROWSER_RSS_LIMIT_MB} MB")
+            elif s["python"] > PYTHON_RSS_LIMIT_MB * _MB:
+                self.trip("python_memory", f"python RSS {s['python'] // _MB} MB > {PYTHON_RSS_LIMIT_MB} MB")
+            elif s["pages"] > BROWSER_MAX_PAGES:
+                self.trip("pages", f"{s['pages']} open pages in {s['contexts']} contexts > {BROWSER_MAX_PAGES}")
+
+    def stop(self):
+        self._stopped = True
+        self._task.cancel()
+        try:
+            self.browser.remove_listener("disconnected", self._on_disconnected)
+        except Exception:
+            pass
+
+_watchdog: BrowserWatchdog | None = None
+
+def _browser_gauges() -> list[tuple]:
+    if _watchdog is None:
+        return []
+    s = _watchdog.sample
+    return [("nhsbot_browser_open", "Open browser contexts and pages at the last watchdog sample", ("kind",),
+             (("contexts", s["contexts"]), ("pages", s["pages"])))]
+
+_gauges.append(_browser_gauges)
+
+async def recycle_browser(browser, pool: "ContextPool", watchdog: BrowserWatchdog):
+    """Close the pool and browser and log what the recycle gave back."""
+    watchdog.stop()
+    before = watchdog.measure()
+    trigger = watchdog.trigger or "scheduled"
+    log(f"♻️  Recycling browser ({watchdog.reason or 'scheduled'})…")
+    try:
+        await pool.close()
+        await browser.close()
+    except Exception:
+        pass
+    gc.collect()
+    await asyncio.sleep(5)
+    own, tree = process_tree_rss()
+    RECYCLES.inc(trigger)
+    log(f"♻️  Browser recycled [{trigger}]: python {before['python'] // _MB}→{own // _MB} MB, "
+        f"browser {before['browser'] // _MB}→{tree // _MB} MB "
+        f"({(before['python'] + before['browser'] - own - tree) // _MB} MB reclaimed), "
+        f"had {before['contexts']} context(s) / {before['pages']} page(s) open.")
+
 # ================= SITE-SPECIFIC PARSERS ================= #
 def parse_nhsjobs(soup: BeautifulSoup, base: str) -> list[dict]:
     jobs = []
     for card in soup.select("li[data-test='search-result']"):
-        a = card.select_one("a[data-test='search-result-job-title']")
-        if not a:
+        tests = index_by(card, "data-test")
+        a = tests.get("search-result-job-title")
+        if not a or a.name != "a":
             continue
         href  = normalize_link(a.get("href", ""), base)
         title = txt(a)
         if not title or not href:
             continue
-        loc_block = card.select_one("[data-test='search-result-location']")
+        loc_block = tests.get("search-result-location")
         employer = location = ""
         if loc_block:
             h3 = loc_block.find("h3")
@@ -685,13 +1966,15 @@ def parse_nhsjobs(soup: BeautifulSoup, base: str) -> list[dict]:
                     loc_div.extract()
                 employer = txt(h3)
         def strong(test: str) -> str:
-            li = card.select_one(f"li[data-test='{test}']")
+            li = tests.get(test)
+            li = li if li is not None and li.name == "li" else None
             return txt(li.find("strong")) if li and li.find("strong") else ""
         jobs.append({
             "title": title, "link": href, "employer": employer,
             "location": location, "salary": strong("search-result-salary"),
             "closing_date": strong("search-result-closingDate"),
             "contract": strong("search-result-jobType"),
+            "posted": strong("search-result-publicationDate"),
             "needs_detail": False, "site": "nhsjobs",
         })
     return jobs
@@ -703,17 +1986,18 @@ def parse_healthjobsuk(soup: BeautifulSoup, base: str) -> list[dict]:
         if not a:
             continue
         href  = normalize_link(a["href"], base)
-        title = sel_txt(li, ".hj-jobtitle") or a.get("title", "").strip()
+        cls   = index_by(li)
+        title = txt(cls.get("hj-jobtitle")) or a.get("title", "").strip()
         if not title:
             continue
         jobs.append({
             "title": title, "link": href,
-            "grade": sel_txt(li, ".hj-grade"),
-            "employer": sel_txt(li, ".hj-employername"),
-            "location": sel_txt(li, ".hj-locationtown"),
-            "speciality": sel_txt(li, ".hj-primaryspeciality"),
-            "salary": sel_txt(li, ".hj-salary"),
-            "needs_detail": False, "site": "healthjobsuk",
+            "grade": txt(cls.get("hj-grade")),
+            "employer": txt(cls.get("hj-employername")),
+            "location": txt(cls.get("hj-locationtown")),
+            "speciality": txt(cls.get("hj-primaryspeciality")),
+            "salary": txt(cls.get("hj-salary")),
+            "needs_detail": True, "site": "healthjobsuk",
         })
     return jobs
 
@@ -768,8 +2052,9 @@ def parse_scotland(soup: BeautifulSoup, base: str) -> list[dict]:
         if uid in seen:
             continue
         seen.add(uid)
+        paras = index_by(card, name="p")
         def detail(css_class: str) -> str:
-            p = card.select_one(f"p.{css_class}")
+            p = paras.get(css_class)
             if not p:
                 return ""
             strong = p.find("strong")
@@ -794,9 +2079,13 @@ def parse_generic(soup: BeautifulSoup, base: str) -> list[dict]:
         title = txt(a)
         if title and len(title) > 8:
             jobs.append({"title": title, "link": normalize_link(a["href"], base),
-                         "needs_detail": False, "site": "generic"})
+                         "needs_detail": True, "site": "generic"})
     return jobs
 
+# Sites whose listing cards leave out fields an alert wants (closing date,
+# contract, hours…); their alerts are enriched from the advert page
+_THIN_CARD_SITES = {"healthjobsuk", "generic"}
+
 def get_parser(url: str):
     if "healthjobsuk.com" in url: return parse_healthjobsuk
     if "jobs.nhs.uk"      in url: return parse_nhsjobs
@@ -804,6 +2093,138 @@ def get_parser(url: str):
     if "jobs.scot.nhs.uk" in url: return parse_scotland
     return parse_generic
 
+# ================= PARSER BACKEND ================= #
+# Only the repeated result cards are turned into nodes (SoupStrainer); the
+# page chrome, scripts and footers are skipped by the tokenizer.
+def _has_class(name: str):
+    return re.compile(r"(?:^|\s)" + re.escape(name) + r"(?:\s|$)")
+
+_PARSE_SCOPES = {
+    parse_nhsjobs:      SoupStrainer("li", attrs={"data-test": "search-result"}),
+    parse_healthjobsuk: SoupStrainer("li", attrs={"class": _has_class("hj-job")}),
+    parse_hscni:        SoupStrainer("article", attrs={"class": _has_class("job-result")}),
+    parse_scotland:     SoupStrainer("div", attrs={"class": _has_class("card-body")}),
+    parse_generic:      SoupStrainer("a", href=True),
+}
+
+def make_soup(html: str, parser=None, backend: str | None = None, scoped: bool | None = None) -> BeautifulSoup:
+    """Parse `html` for `parser` with HTML_PARSER, keeping only its result cards when PARSE_SCOPED."""
+    scoped = PARSE_SCOPED if scoped is None else scoped
+    strainer = _PARSE_SCOPES.get(parser) if scoped else None
+    return BeautifulSoup(html, backend or HTML_PARSER, parse_only=strainer)
+
+# ================= IN-BROWSER EXTRACTION ================= #
+# Each site's card selector and fields, mirroring its parse_* function, run
+# inside the page so only compact job records cross the CDP connection
+# instead of the whole serialised DOM. Returned records carry the raw "href";
+# links are normalised in Python. The Python parsers remain the fallback.
+_JS_TEXT = "const t = el => el ? el.textContent.split(/\\s+/).filter(Boolean).join(' ') : '';"
+
+def _stripped(var: str) -> str:
+    # Text of `var` without its first <strong> (the field label), as the parsers do
+    return (f"(() => {{ if (!{var}) return ''; const c = {var}.cloneNode(true);"
+            f" const s = c.querySelector('strong'); if (s) s.remove(); return t(c); }})()")
+
+_BROWSER_EXTRACTORS = {
+    parse_nhsjobs: ("nhsjobs", """() => { %s
+        return [...document.querySelectorAll("li[data-test='search-result']")].map(card => {
+            const a = card.querySelector("a[data-test='search-result-job-title']");
+            if (!a) return null;
+            let employer = '', location = '';
+            const block = card.querySelector("[data-test='search-result-location']");
+            const h3 = block ? block.querySelector('h3') : null;
+            if (h3) {
+                const h = h3.cloneNode(true);
+                const loc = h.querySelector('div.location-font-size');
+                if (loc) { location = t(loc); loc.remove(); }
+                employer = t(h);
+            }
+            const strong = test => {
+                const li = card.querySelector(`li[data-test='${test}']`);
+                return li ? t(li.querySelector('strong')) : '';
+            };
+            return {title: t(a), href: a.getAttribute('href') || '', employer, location,
+                    salary: strong('search-result-salary'),
+                    closing_date: strong('search-result-closingDate'),
+                    contract: strong('search-result-jobType'),
+                    posted: strong('search-result-publicationDate')};
+        }).filter(Boolean);
+    }""" % _JS_TEXT),
+
+    parse_healthjobsuk: ("healthjobsuk", """() => { %s
+        return [...document.querySelectorAll('li.hj-job')].map(li => {
+            const a = li.querySelector('a[href]');
+            if (!a) return null;
+            const f = cls => t(li.querySelector('.' + cls));
+            return {title: f('hj-jobtitle') || (a.getAttribute('title') || '').trim(),
+                    href: a.getAttribute('href'), grade: f('hj-grade'),
+                    employer: f('hj-employername'), location: f('hj-locationtown'),
+                    speciality: f('hj-primaryspeciality'), salary: f('hj-salary')};
+        }).filter(Boolean);
+    }""" % _JS_TEXT),
+
+    parse_hscni: ("hscni", """() => { %s
+        return [...document.querySelectorAll('article.job-result')].map(art => {
+            const a = art.querySelector('h2 a');
+            if (!a) return null;
+            const ref = art.querySelector('.job-ref');
+            const overview = {};
+            art.querySelectorAll('ul.job-overview li').forEach(li => {
+                const s = li.querySelector('strong');
+                if (!s) return;
+                overview[t(s).replace(/:+$/, '').toLowerCase()] = %s;
+            });
+            const closing = art.querySelector('.job-closing');
+            return {title: t(a), href: a.getAttribute('href') || '',
+                    ref: ref ? t(ref).split('Ref:').join('').trim() : '',
+                    salary: overview['salary'] || '', location: overview['location'] || '',
+                    contract: overview['contract type'] || '', closing_date: %s};
+        }).filter(Boolean);
+    }""" % (_JS_TEXT, _stripped("li"), _stripped("closing"))),
+
+    parse_scotland: ("scotland", """() => { %s
+        const seen = new Set();
+        return [...document.querySelectorAll('div.card-body')].map(card => {
+            const a = card.querySelector("a[href*='JobDetail']");
+            if (!a) return null;
+            const href = a.getAttribute('href') || '';
+            const m = href.match(/JobId=(\\d+)/);
+            const uid = m ? m[1] : href;
+            if (seen.has(uid)) return null;
+            seen.add(uid);
+            const d = cls => { const p = card.querySelector('p.' + cls); return %s; };
+            return {title: t(a), href, ref: d('jobreference'), salary: d('salary'),
+                    closing_date: d('closingdate'), job_family: d('department'),
+                    location: d('location'), employment_type: d('employmenttype'),
+                    hours: d('hours'), employer: d('school'), department: d('shift')};
+        }).filter(Boolean);
+    }""" % (_JS_TEXT, _stripped("p"))),
+
+    parse_generic: ("generic", """() => { %s
+        return [...document.querySelectorAll('a[href]')]
+            .filter(a => a.getAttribute('href').toLowerCase().includes('job'))
+            .map(a => ({title: t(a), href: a.getAttribute('href')}))
+            .filter(r => r.title.length > 8);
+    }""" % _JS_TEXT),
+}
+
+async def extract_in_page(page, parser, base: str) -> list[dict] | None:
+    """Run the site's extractor in the page; None when it fails or finds nothing."""
+    site, script = _BROWSER_EXTRACTORS[parser]
+    try:
+        records = await page.evaluate(script)
+    except Exception as e:
+        log(f"   ↪️  In-page extraction failed ({e}) — using Python parser.")
+        return None
+    jobs = []
+    for rec in records or []:
+        href = normalize_link(rec.pop("href", "") or "", base)
+        if not rec.get("title") or not href:
+            continue
+        rec["link"] = href
+        jobs.append({**rec, "needs_detail": site in _THIN_CARD_SITES, "site": site})
+    return jobs or None
+
 # ================= MESSAGE FORMATTERS ================= #
 def format_nhsjobs(job: dict) -> str:
     lines = ["🚨 <b>NEW NHS JOB — England</b>\n", f"🏥 <b>{job['title']}</b>"]
@@ -822,6 +2243,9 @@ def format_healthjobsuk(job: dict) -> str:
     if job.get("location"):   lines.append(f"📍 {job['location']}")
     if job.get("speciality"): lines.append(f"🔬 {job['speciality']}")
     if job.get("salary"):     lines.append(f"💷 {job['salary']}")
+    if job.get("contract"):   lines.append(f"📋 {job['contract']}")
+    if job.get("hours"):      lines.append(f"🕐 {job['hours']}")
+    if job.get("closing_date"): lines.append(f"📅 Closes: {job['closing_date']}")
     lines.append(f"🔗 {job['link']}")
     return "\n".join(lines)
 
@@ -856,163 +2280,1026 @@ def format_message(job: dict) -> str:
     if site == "hscni":        return format_hscni(job)
     if site == "scotland":     return format_scotland(job)
     lines = [f"🚨 <b>NEW NHS JOB</b>\n", f"🏥 <b>{job['title']}</b>"]
+    if job.get("grade"):    lines.append(f"🎓 {job['grade']}")
+    if job.get("employer"): lines.append(f"🏢 {job['employer']}")
     if job.get("location"): lines.append(f"📍 {job['location']}")
     if job.get("salary"):   lines.append(f"💷 {job['salary']}")
+    if job.get("contract"): lines.append(f"📋 {job['contract']}")
+    if job.get("closing_date"): lines.append(f"📅 Closes: {job['closing_date']}")
     lines.append(f"🔗 {job['link']}")
     return "\n".join(lines)
 
-# ================= SINGLE-URL SCRAPER ================= #
-async def check_site(url: str, seen_jobs: set, browser, is_first_cycle: bool = False) -> int:
+# ================= UNCHANGED-PAGE FINGERPRINTS ================= #
+# Per-URL record of the last successfully processed listing:
+#   etag / last_modified – validators for the next conditional GET
+#   html_hash            – page hash with scripts, styles and hidden inputs stripped
+#   ids_hash             – hash of the ordered job IDs on the page
+# Only stored after process_candidates succeeds, so a failed pass is retried.
+_fingerprints: dict[str, dict] = {}
+_cycle_stats = {"unchanged": 0}
+NOT_MODIFIED = object()
+
+_VOLATILE_MARKUP = re.compile(
+    r"<script\b.*?</script>|<style\b.*?</style>|<input\b[^>]*type=[\"']?hidden[^>]*>|\snonce=\"[^\"]*\"",
+    re.I | re.S,
+)
+
+def html_fingerprint(html: str) -> str:
+    stable = _VOLATILE_MARKUP.sub("", html)
+    return hashlib.blake2b(stable.encode("utf-8", "replace"), digest_size=16).hexdigest()
+
+def ids_fingerprint(candidates: list[dict]) -> str:
+    ids = "\n".join(extract_job_id(job["link"]) for job in candidates)
+    return hashlib.blake2b(ids.encode("utf-8", "replace"), digest_size=16).hexdigest()
+
+def _short_circuit(url: str, reason: str) -> int:
+    _cycle_stats["unchanged"] += 1
+    log(f"   💤 [{url[:60]}] {reason} — short-circuited.")
+    return 0
+
+# ================= RECORD / REPLAY ================= #
+# --record DIR appends every check and every fetched listing (URL, status,
+# HTML or in-page records, timestamp) to DIR/listings.jsonl; --replay DIR
+# feeds them back through fetch_http / fetch_browser with no network or
+# browser, so the whole scrape → filter → deliver pipeline can be rerun.
+class Recorder:
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "listings.jsonl")
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    def _write(self, rec: dict):
+        rec["ts"] = time.time()
+        self._f.write(json.dumps(rec) + "\n")
+        self._f.flush()
+
+    def check(self, url: str):
+        self._write({"check": url})
+
+    def http(self, url: str, status: int, html, validators: dict):
+        self._write({"url": url, "via": "http", "status": status,
+                     "html": html if isinstance(html, str) else None, "validators": validators})
+
+    def browser(self, url: str, rendered: tuple | None):
+        html, jobs = rendered or (None, None)
+        self._write({"url": url, "via": "browser", "status": _last_status.get(url, 0),
+                     "html": html, "jobs": jobs})
+
+    def close(self):
+        self._f.close()
+
+class Replayer:
+    """Recorded fetches queued per (url, via), handed out in recorded order."""
+
+    def __init__(self, directory: str):
+        self.checks: list[tuple[float, str]] = []
+        self._fetches: dict[tuple, deque] = {}
+        with open(os.path.join(directory, "listings.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                rec = json.loads(line)
+                if "check" in rec:
+                    self.checks.append((rec["ts"], rec["check"]))
+                else:
+                    self._fetches.setdefault((rec["url"], rec["via"]), deque()).append(rec)
+
+    def _next(self, url: str, via: str) -> dict | None:
+        q = self._fetches.get((url, via))
+        return q.popleft() if q else None
+
+    def http(self, url: str) -> tuple:
+        rec = self._next(url, "http")
+        if rec is None or rec["status"] not in (200, 304):
+            return None, {}
+        if rec["status"] == 304:
+            return NOT_MODIFIED, {}
+        return rec["html"], rec.get("validators") or {}
+
+    def browser(self, url: str) -> tuple | None:
+        rec = self._next(url, "browser")
+        if rec is None:
+            return None
+        _last_status[url] = rec["status"]
+        if rec.get("jobs"):
+            return None, rec["jobs"]
+        return (rec["html"], None) if rec.get("html") else None
+
+_recorder: Recorder | None = None
+_replayer: Replayer | None = None
+
+async def start_standin_server(log_path: str) -> tuple:
     """
-    Scrape one URL. For each unseen job, evaluate ALL filters at once and
-    dispatch to every matching destination in a single pass.
-
-    Routing rules:
-      - Early filter match  → personal Telegram immediately;
-                              Telegram group + main Whop channel after EARLY_DELAY
-      - Specialty match (no early) → that specialty's Whop channel immediately
-      - Broad filter only   → Telegram group immediately
-    A job can match early AND one or more specialties simultaneously.
+    Local stand-in for the Telegram and Whop APIs: accepts every send, and
+    logs it with a timestamp to `log_path`. Returns (runner, base_url, received).
     """
-    log(f"🔍 Checking: {url}")
-    new_jobs = 0
-    base   = get_base(url)
-    parser = get_parser(url)
-
-    context = page = None
+    received: list[dict] = []
+    out = open(log_path, "w", encoding="utf-8")
+
+    async def handle(request):
+        if request.path.endswith("/sendMessage"):
+            form = await request.post()
+            rec = {"api": "telegram", "target": form.get("chat_id"), "text": form.get("text", "")}
+            reply = web.json_response({"ok": True, "result": {}})
+        else:
+            body = await request.json()
+            rec = {"api": "whop", "target": body.get("channel_id"), "text": body.get("content", "")}
+            reply = web.json_response({"id": len(received)}, status=201)
+        rec["ts"] = time.time()
+        received.append(rec)
+        out.write(json.dumps(rec) + "\n")
+        return reply
+
+    app = web.Application()
+    app.router.add_post("/{path:.*}", handle)
+    async def close_log(_app):
+        out.close()
+
+    app.on_cleanup.append(close_log)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}", received
+
+# ================= PAGE FETCHERS ================= #
+_ctx_sem: asyncio.Semaphore | None = None
+_http_sem: asyncio.Semaphore | None = None
+_http_session: aiohttp.ClientSession | None = None
+
+# <title> fragments of bot-challenge / block pages served with a 200
+_CHALLENGE_TITLES = ("just a moment", "attention required", "access denied",
+                     "security check", "are you a robot", "request rejected")
+
+def uses_http_fetch(url: str) -> bool:
+    return any(site in url for site in HTTP_FETCH_SITES)
+
+def _get_http_session() -> aiohttp.ClientSession:
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=MAX_CONCURRENT_HTTP, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+            headers={
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-GB,en;q=0.9", "DNT": "1",
+            },
+        )
+    return _http_session
+
+async def close_http():
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+
+def _is_challenge_page(html: str) -> bool:
+    m = re.search(r"<title[^>]*>(.*?)</title>", html[:20_000], re.I | re.S)
+    title = m.group(1).strip().lower() if m else ""
+    return any(marker in title for marker in _CHALLENGE_TITLES)
+
+async def fetch_http(url: str, fp: dict | None = None) -> tuple:
+    """
+    GET a listing without a browser, conditionally when `fp` holds validators.
+    Returns (html, validators); html is NOT_MODIFIED on a 304 and None when the
+    browser path should be used instead.
+    """
+    if _replayer is not None:
+        return _replayer.http(url)
+    html, validators, status = await _fetch_http(url, fp)
+    if _recorder is not None:
+        _recorder.http(url, status, html, validators)
+    return html, validators
+
+async def _fetch_http(url: str, fp: dict | None) -> tuple:
+    """fetch_http's (html, validators) plus the response status, 0 when there was no response."""
+    headers = {"User-Agent": ua.random}
+    if fp and fp.get("etag"):
+        headers["If-None-Match"] = fp["etag"]
+    if fp and fp.get("last_modified"):
+        headers["If-Modified-Since"] = fp["last_modified"]
+    try:
+        async with _http_sem:
+            async with _get_http_session().get(url, headers=headers) as r:
+                if r.status == 304:
+                    return NOT_MODIFIED, {}, 304
+                if r.status != 200:
+                    log(f"   ↪️  HTTP {r.status} on {url[:60]} — falling back to browser.")
+                    return None, {}, r.status
+                html = await r.text(errors="replace")
+                validators = {"etag": r.headers.get("ETag", ""),
+                              "last_modified": r.headers.get("Last-Modified", "")}
+    except asyncio.TimeoutError:
+        log(f"   ↪️  HTTP timeout on {url[:60]} — falling back to browser.")
+        return None, {}, 0
+    except Exception as e:
+        log(f"   ↪️  HTTP error on {url[:60]}: {e} — falling back to browser.")
+        return None, {}, 0
+    if _is_challenge_page(html):
+        log(f"   ↪️  Challenge page on {url[:60]} — falling back to browser.")
+        return None, {}, 200
+    return html, validators, 200
+
+async def _render(url: str, pool: ContextPool, parser) -> tuple:
+    lease = None
+    retire = True
     try:
-        context = await new_context(browser)
-        page = await context.new_page()
-        await stealth_async(page)
+        lease = await pool.acquire(url)
+        page, blocked = lease["page"], lease["blocked"]
         await asyncio.sleep(random.uniform(0, 5))
 
         if not await goto_with_retry(page, url):
             log(f"⛔ Giving up on {url}.")
-            return 0
+            retire = _last_status.get(url) in (0, 403)
+            return None
 
         await random_mouse_move(page)
         await asyncio.sleep(random.uniform(0.8, 2.0))
-        await human_scroll(page)
+        with STAGE_SECONDS.time("scroll", url):
+            await human_scroll(page)
+        log(f"   🚫 [{url[:60]}] {blocked['blocked']} request(s) blocked "
+            f"(~{blocked['bytes_saved'] // 1024} KiB saved), {blocked['allowed']} allowed.")
+        result = None
+        if EXTRACT_MODE == "browser":
+            with STAGE_SECONDS.time("extract", url):
+                jobs = await extract_in_page(page, parser, get_base(url))
+            if jobs:
+                result = (None, jobs)
+        if result is None:
+            with STAGE_SECONDS.time("content", url):
+                result = (await page.content(), None)
+        retire = False
+        return result
+    finally:
+        if lease:
+            await pool.release(lease, retire=retire)
 
-        soup       = BeautifulSoup(await page.content(), "html.parser")
-        candidates = parser(soup, base)
-        log(f"   [{url[:60]}] {len(candidates)} candidate(s).")
+async def fetch_browser(url: str, pool: ContextPool, parser) -> tuple | None:
+    """
+    Render a listing in a pooled Chromium context. Holds one of the
+    MAX_CONCURRENT_CONTEXTS slots. Returns (None, jobs) when the in-page
+    extractor produced records, otherwise (html, None) for the Python parser;
+    None on failure.
+    """
+    if _replayer is not None:
+        return _replayer.browser(url)
+    rendered = await _fetch_browser(url, pool, parser)
+    if _recorder is not None:
+        _recorder.browser(url, rendered)
+    return rendered
+
+async def _fetch_browser(url: str, pool: ContextPool, parser) -> tuple | None:
+    t0 = time.perf_counter()
+    async with _ctx_sem:
+        CTX_WAIT_SECONDS.observe(time.perf_counter() - t0)
+        try:
+            return await asyncio.wait_for(_render(url, pool, parser), timeout=SITE_HARD_LIMIT)
+        except asyncio.TimeoutError:
+            log(f"⏰ Hard timeout ({SITE_HARD_LIMIT}s) hit for {url[:60]} — skipping.")
+            return None
+
+# ================= DETAIL ENRICHMENT ================= #
+MAX_CONCURRENT_DETAILS = 4      # advert-page fetches in flight, apart from the listing scrapes
+DETAIL_CACHE_SIZE      = 5000
+DETAIL_HOLD            = DETAIL_TIMEOUT / 1000 + 5   # most an enriched job's immediate sends wait
+
+# Label on an advert page → job field; first match wins, so order matters
+_DETAIL_FIELDS = [
+    (re.compile(r"closing date|closes|apply by|deadline", re.I),        "closing_date"),
+    (re.compile(r"\bgrade\b|\bband\b", re.I),                           "grade"),
+    (re.compile(r"contract|employment type|job type", re.I),            "contract"),
+    (re.compile(r"\bhours\b|working pattern", re.I),                    "hours"),
+    (re.compile(r"\bsalary\b|\bpay\b", re.I),                           "salary"),
+    (re.compile(r"\bemployer\b|organisation|\btrust\b", re.I),          "employer"),
+    (re.compile(r"\blocation\b|\btown\b", re.I),                        "location"),
+    (re.compile(r"reference|\bref\b", re.I),                            "ref"),
+]
+
+def parse_detail(html: str) -> dict:
+    """Job fields from an advert page's label/value pairs: dt/dd, th/td and '<strong>Label:</strong> value'."""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    pairs = []
+    for label_tag, value_tag in (("dt", "dd"), ("th", "td")):
+        for el in soup.find_all(label_tag):
+            value = el.find_next_sibling(value_tag)
+            if value is not None:
+                pairs.append((txt(el), txt(value)))
+    for el in soup.find_all(["strong", "b"]):
+        label = txt(el)
+        if label.endswith(":") and el.parent is not None:
+            pairs.append((label, txt(el.parent).replace(label, "", 1).strip()))
+    fields = {}
+    for label, value in pairs:
+        label = label.rstrip(": ")
+        if not value or len(label) > 40 or len(value) > 200:
+            continue
+        for pattern, field in _DETAIL_FIELDS:
+            if pattern.search(label):
+                fields.setdefault(field, value)
+                break
+    return fields
+
+class DetailEnricher:
+    """
+    Fills in what a thin listing card (needs_detail) leaves out by fetching
+    the advert page after the alert is queued: at most MAX_CONCURRENT_DETAILS
+    at once on a session of its own, each within DETAIL_TIMEOUT, with results
+    cached by job ID. Fields the card lacked are merged in, the message is
+    re-rendered and swapped into the job's outbox rows that have not gone out
+    yet, which are then released. The early-chat alert is never held.
+    """
 
-        for job in candidates:
+    def __init__(self, outbox: Outbox):
+        self.outbox = outbox
+        self._sem = asyncio.Semaphore(MAX_CONCURRENT_DETAILS)
+        self._cache: dict[str, dict] = {}
+        self._tasks: set = set()
+        self._http: aiohttp.ClientSession | None = None
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=MAX_CONCURRENT_DETAILS, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=DETAIL_TIMEOUT / 1000),
+                headers={"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                         "Accept-Language": "en-GB,en;q=0.9", "DNT": "1"},
+            )
+        return self._http
+
+    def submit(self, job_id: str, job: dict):
+        task = asyncio.create_task(self._enrich(job_id, job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def details(self, job_id: str, link: str) -> dict | None:
+        """Fields parsed from the advert page, or None when it could not be fetched."""
+        if job_id in self._cache:
+            DETAILS.inc("cached")
+            return self._cache[job_id]
+        async with self._sem:
             try:
-                link   = job["link"]
-                job_id = extract_job_id(link)
+                with STAGE_SECONDS.time("detail", get_base(link)):
+                    async with self._session().get(link, headers={"User-Agent": ua.random}) as r:
+                        if r.status != 200:
+                            raise ValueError(f"HTTP {r.status}")
+                        html = await r.text(errors="replace")
+                if _is_challenge_page(html):
+                    raise ValueError("challenge page")
+            except Exception as e:
+                DETAILS.inc("failed")
+                log(f"   ↪️  Detail page for {job_id} not used: {str(e) or type(e).__name__}")
+                return None
+        DETAILS.inc("fetched")
+        fields = self._cache[job_id] = parse_detail(html)
+        if len(self._cache) > DETAIL_CACHE_SIZE:
+            del self._cache[next(iter(self._cache))]
+        return fields
+
+    async def _enrich(self, job_id: str, job: dict):
+        try:
+            fields = await self.details(job_id, job["link"])
+        except asyncio.CancelledError:
+            self.outbox.revise(job_id)   # shutting down: let held sends go as they are
+            raise
+        extra = {k: v for k, v in (fields or {}).items() if not job.get(k)}
+        msg = format_message({**job, **extra}) if extra else None
+        try:
+            revised = self.outbox.revise(job_id, msg)   # releases held sends, enriched or not
+        except Exception as e:
+            log(f"⚠️  Could not update queued sends for {job_id}: {e}")
+            return
+        if msg:
+            log(f"   🔎 Enriched {job_id} with {', '.join(extra)} — {revised} queued send(s) updated.")
 
-                async with _seen_lock:
-                    if job_id in seen_jobs:
-                        continue
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
 
-                title = job.get("title", "")
-                if not title:
-                    continue
+_enricher: DetailEnricher | None = None
 
-                # Combine title + speciality/job_family fields for richer matching
-                search_text = " ".join(filter(None, [
-                    title,
-                    job.get("speciality", ""),
-                    job.get("job_family", ""),
-                ]))
+# ================= SINGLE-URL SCRAPER ================= #
+_scrape_ok: dict[str, bool] = {}   # url → whether its last check_site got a listing
 
-                # Evaluate all filters before touching seen_jobs
-                goes_early    = relevant_for_early(search_text)
-                goes_chat     = relevant_for_chat(search_text)
-                matched_specs = [ch for ch in SPECIALTY_CHANNELS
-                                 if relevant_for_specialty(search_text, ch)]
+async def _fetch_listing(url: str, pool: ContextPool, parser, base: str, fp: dict) -> tuple:
+    """
+    Fetch and parse one listing page. Returns (candidates, new_fp, unchanged):
+    `unchanged` names the reason when the page matches `fp` and was not parsed;
+    candidates is None when the page could not be fetched. Each candidate is
+    stamped with `first_seen`, the time the listing response arrived.
+    """
+    if uses_http_fetch(url):
+        with STAGE_SECONDS.time("http_fetch", url):
+            html, validators = await fetch_http(url, fp)
+        fetched_at = time.time()
+        if html is NOT_MODIFIED:
+            return None, {}, "304 Not Modified"
+        if html is not None:
+            new_fp = {**validators, "html_hash": html_fingerprint(html)}
+            if new_fp["html_hash"] == fp.get("html_hash"):
+                return None, {}, "page unchanged"
+            with STAGE_SECONDS.time("parse", url):
+                candidates = parser(make_soup(html, parser), base)
+            if candidates:
+                return _stamp_seen(candidates, fetched_at), new_fp, ""
+            log(f"   ↪️  Empty parse over HTTP on {url[:60]} — falling back to browser.")
+
+    rendered = await fetch_browser(url, pool, parser)
+    fetched_at = time.time()
+    if rendered is None:
+        return None, {}, ""
+    html, candidates = rendered
+    if html is not None and _is_challenge_page(html):
+        log(f"   ↪️  Challenge page rendered in the browser on {url[:60]} — not counted as a check.")
+        return None, {}, ""
+    new_fp = {}
+    if candidates is None:
+        new_fp["html_hash"] = html_fingerprint(html)
+        if new_fp["html_hash"] == fp.get("html_hash"):
+            return None, {}, "page unchanged"
+        with STAGE_SECONDS.time("parse", url):
+            candidates = parser(make_soup(html, parser), base)
+    return _stamp_seen(candidates, fetched_at), new_fp, ""
+
+def _stamp_seen(candidates: list[dict], fetched_at: float) -> list[dict]:
+    for job in candidates:
+        job["first_seen"] = fetched_at
+    return candidates
+
+def pagination_rule(url: str) -> dict | None:
+    return next((rule for rule in PAGINATED_LISTINGS if rule["match"] in url), None)
+
+def with_page(url: str, param: str, page: int) -> str:
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != param]
+    query.append((param, str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+async def _crawl_more_pages(url: str, pool: ContextPool, parser, base: str,
+                            first_page: list[dict], seen_jobs: SeenStore, known: set) -> list[dict]:
+    """
+    Follow a newest-first listing past page one only while every job on the
+    current page is new to us, stopping at the first already-known ID or at
+    the site's page cap. In steady state this costs nothing. A page that
+    repeats the previous one means the site ignored the page parameter, so
+    the crawl stops there too.
+    """
+    rule = pagination_rule(url)
+    if not rule:
+        return []
+    extra: list[dict] = []
+    page_jobs = first_page
+    for n in range(2, rule["max_pages"] + 1):
+        ids = [extract_job_id(job["link"]) for job in page_jobs]
+        if not ids or any(i in known or i in seen_jobs for i in ids):
+            break
+        page_url = with_page(url, rule["param"], n)
+        page_jobs, _, _ = await _fetch_listing(page_url, pool, parser, base, {})
+        if not page_jobs:
+            break
+        if {extract_job_id(job["link"]) for job in page_jobs} == set(ids):
+            log(f"   ⚠️  [{url[:60]}] page {n} repeats page {n - 1} — is {rule['param']!r} still "
+                f"the page parameter? Stopping.")
+            break
+        log(f"   📄 [{url[:60]}] page {n}: {len(page_jobs)} candidate(s) — burst, following on.")
+        extra.extend(page_jobs)
+    return extra
+
+async def check_site(url: str, seen_jobs: SeenStore, pool: ContextPool, is_first_cycle: bool = False) -> int:
+    """
+    Scrape one URL. Server-rendered sites (HTTP_FETCH_SITES) are fetched over
+    plain HTTP first; a non-200, a challenge page or an empty parse falls back
+    to the browser. Parsing is skipped on a 304 or an unchanged page hash, and
+    filtering is skipped when the ordered job IDs match the last pass.
+    Newest-first listings (PAGINATED_LISTINGS) are followed onto later pages
+    while page after page holds only unseen jobs.
+    """
+    log(f"🔍 Checking: {url}")
+    if _recorder is not None:
+        _recorder.check(url)
+    base   = get_base(url)
+    parser = get_parser(url)
+    fp     = _fingerprints.get(url, {})
+    _scrape_ok[url] = False   # set by _succeeded; a cancelled or failed check leaves it False
 
-                if not goes_early and not goes_chat and not matched_specs:
-                    continue
+    try:
+        candidates, new_fp, unchanged = await _fetch_listing(url, pool, parser, base, fp)
+        if unchanged:
+            _succeeded(url, seen_jobs)
+            return _short_circuit(url, unchanged)
+        if candidates is None:
+            return 0
 
-                # Mark seen atomically — only one task wins for a given job_id
-                async with _seen_lock:
-                    if job_id in seen_jobs:
-                        continue
-                    seen_jobs.add(job_id)
+        new_fp["ids_hash"] = ids_fingerprint(candidates)
+        if candidates and new_fp["ids_hash"] == fp.get("ids_hash"):
+            _fingerprints[url] = {**new_fp, "ids": fp.get("ids", [])}
+            _succeeded(url, seen_jobs)
+            return _short_circuit(url, "same job list")
 
-                if is_first_cycle:
-                    log(f"   👁️  SEEN (first cycle, no alert): {title}")
-                else:
-                    msg = format_message(job)
-                    destinations = []
-
-                    if goes_early:
-                        destinations.append("early+group+Whop(delayed)")
-                        if matched_specs:
-                            destinations.extend(f"{ch['name']}(delayed)" for ch in matched_specs)
-                        _tg_queue.put_nowait((EARLY_CHAT_ID, msg))
-                        asyncio.create_task(_schedule_group_send(msg, matched_specs))
-                    else:
-                        if goes_chat:
-                            destinations.append("group+Whop")
-                            _tg_queue.put_nowait((CHAT_ID, msg))
-                            async with aiohttp.ClientSession() as _s:
-                                await _send_whop(_s, msg, channel_id=WHOP_CHANNEL_ID)
-                        if matched_specs:
-                            for ch in matched_specs:
-                                destinations.append(ch["name"])
-                            async with aiohttp.ClientSession() as _s:
-                                for ch in matched_specs:
-                                    await _send_whop(_s, msg, channel_id=ch["whop_channel"])
-
-                    log(f"   🆕 NEW JOB [{job.get('site','?')}] → {', '.join(destinations)}: {title}")
-
-                await async_save_seen(job_id)
-                new_jobs += 1
+        if not is_first_cycle and fp.get("ids"):   # need a previous pass to tell old from new
+            candidates = candidates + await _crawl_more_pages(
+                url, pool, parser, base, candidates, seen_jobs, set(fp.get("ids", [])))
 
-            except Exception as e:
-                log(f"   ⚠️  Entry error: {e}")
+        if not candidates and is_first_cycle:
+            # A blank or half-rendered page must not seed the URL, or the next good check alerts every old job
+            log(f"   ↪️  [{url[:60]}] no candidates on the seeding pass — not counted as seeded.")
+            return 0
 
+        log(f"   [{url[:60]}] {len(candidates)} candidate(s).")
+        CANDIDATES.inc(url, n=len(candidates))
+        with STAGE_SECONDS.time("filter", url):
+            new_jobs = await process_candidates(candidates, seen_jobs, is_first_cycle)
+        NEW_JOBS.inc(url, n=new_jobs)
+        # Every ID on the listing (matched or not), so pagination can tell old from new
+        new_fp["ids"] = [extract_job_id(job["link"]) for job in candidates][:500]
+        _fingerprints[url] = new_fp
+        _succeeded(url, seen_jobs)
         log(f"   ✅ [{url[:60]}] {new_jobs} new job(s) found.")
+        return new_jobs
 
     except Exception as e:
         log(f"❌ SCRAPER ERROR on {url}: {e}")
-    finally:
-        for obj in (page, context):
-            if obj:
-                try:
-                    await obj.close()
-                except Exception:
-                    pass
+        return 0
 
-    return new_jobs
+def _succeeded(url: str, seen_jobs: SeenStore):
+    """Mark this check of `url` good and checkpoint its fingerprint — only once it has fully succeeded."""
+    _scrape_ok[url] = True
+    seen_jobs.checkpoint(url, {**_fingerprints.get(url, {}), "filters": _filters_digest})
 
-# ================= PARALLEL CYCLE ================= #
-_ctx_sem: asyncio.Semaphore | None = None
+def restore_checkpoints(seen_jobs: SeenStore) -> dict[str, float]:
+    """
+    Warm start: URLs successfully checked within RESUME_WINDOW count as
+    seeded, so their first check alerts on whatever appeared while we were
+    down, and get their listing fingerprints back (for pagination and
+    short-circuiting). Short-circuit hashes are only reused when the filter
+    config is unchanged. Returns url → checkpoint age in seconds.
+    """
+    now = time.time()
+    ages = {}
+    for url, (checked_at, state) in seen_jobs.checkpoints(now - RESUME_WINDOW).items():
+        if state.pop("filters", None) != _filters_digest:
+            state = {"ids": state.get("ids", [])}
+        _fingerprints[url] = state
+        _seeded_urls.add(url)
+        ages[url] = now - checked_at
+    return ages
+
+async def process_candidates(candidates: list[dict], seen_jobs: SeenStore, is_first_cycle: bool = False) -> int:
+    """
+    For each unseen job, evaluate ALL filters at once and dispatch to every
+    matching destination in a single pass.
 
-async def _site_with_timeout(url: str, seen_jobs: set, browser, is_first_cycle: bool = False) -> int:
-    async with _ctx_sem:
+    Routing rules:
+      - Early filter match  → personal Telegram immediately;
+                              Telegram group + main Whop channel after EARLY_DELAY
+      - Specialty match (no early) → that specialty's Whop channel immediately
+      - Broad filter only   → Telegram group immediately
+    A job can match early AND one or more specialties simultaneously.
+    """
+    new_jobs = 0
+    retry = 0
+    for job in candidates:
         try:
-            return await asyncio.wait_for(
-                check_site(url, seen_jobs, browser, is_first_cycle),
-                timeout=SITE_HARD_LIMIT,
-            )
-        except asyncio.TimeoutError:
-            log(f"⏰ Hard timeout ({SITE_HARD_LIMIT}s) hit for {url[:60]} — skipping.")
-            return 0
+            link   = job["link"]
+            job_id = extract_job_id(link)
+
+            if job_id in seen_jobs:
+                continue
+
+            title = job.get("title", "")
+            if not title:
+                continue
+
+            # Combine title + speciality/job_family fields for richer matching
+            search_text = " ".join(filter(None, [
+                title,
+                job.get("speciality", ""),
+                job.get("job_family", ""),
+            ]))
+
+            # Evaluate all filters (one scan) before touching seen_jobs
+            goes_early, goes_chat, matched_specs = route_job(search_text)
+
+            if not goes_early and not goes_chat and not matched_specs:
+                continue
+
+            # Claim atomically — only one task (or worker process) wins for a given job_id
+            try:
+                claimed, original = seen_jobs.claim(job_id, job, expires_at=seen_expiry(job))
+            except sqlite3.OperationalError as e:
+                retry += 1
+                log(f"   ⏳ Could not claim {job_id} ({e}) — retrying it on the next check.")
+                continue
+            if not claimed:
+                continue
+            job.setdefault("first_seen", time.time())   # normally stamped by _fetch_listing
+
+            if original and not is_first_cycle:
+                log(f"   ♊ DUPLICATE of {original} [{job.get('site','?')}], not alerted: {title}")
+                continue
+            if is_first_cycle:
+                log(f"   👁️  SEEN (first cycle, no alert): {title}")
+            else:
+                enrich = _enricher is not None and job.get("needs_detail")
+                try:
+                    destinations = dispatch_alert(job_id, format_message(job), goes_early, goes_chat,
+                                                  matched_specs, job, hold=DETAIL_HOLD if enrich else 0)
+                except Exception as e:
+                    # Claimed but nothing queued: release the claim so the next check alerts it
+                    retry += 1
+                    log(f"   ⏳ Could not queue {job_id} ({e}) — retrying it on the next check.")
+                    try:
+                        seen_jobs.unclaim(job_id)
+                    except Exception as e2:
+                        log(f"   ⚠️  Could not release the claim on {job_id} either ({e2}) — it will not be alerted.")
+                    continue
+                if enrich:
+                    _enricher.submit(job_id, job)
+
+                log(f"   🆕 NEW JOB [{job.get('site','?')}] → {', '.join(destinations)}: {title}")
+
+            new_jobs += 1
+
         except Exception as e:
-            log(f"⚠️  Task error for {url[:60]}: {e}")
-            return 0
+            log(f"   ⚠️  Entry error: {e}")
 
+    if retry:
+        # Fail the check so its fingerprint is not saved and the next pass re-reads these jobs
+        raise RuntimeError(f"{retry} job(s) left unclaimed for a retry ({new_jobs} alerted)")
+    return new_jobs
 
-async def run_cycle(seen_jobs: set, browser, is_first_cycle: bool = False):
+# ================= PARALLEL CYCLE ================= #
+async def _site_task(url: str, seen_jobs: SeenStore, pool: ContextPool, is_first_cycle: bool = False) -> int:
+    try:
+        return await check_site(url, seen_jobs, pool, is_first_cycle)
+    except Exception as e:
+        log(f"⚠️  Task error for {url[:60]}: {e}")
+        return 0
+
+
+def all_urls() -> list[str]:
     # Deduplicate URLs across main + all specialty channels — scrape each URL once
-    all_urls = list(dict.fromkeys(
+    return list(dict.fromkeys(
         URLS + [u for ch in SPECIALTY_CHANNELS for u in ch["urls"]]
     ))
-    label = " (first cycle — seeding seen list, no alerts)" if is_first_cycle else ""
-    log(f"🚀 Cycle — {len(all_urls)} unique URLs, {MAX_CONCURRENT_CONTEXTS} concurrent contexts{label}…")
-    tasks   = [asyncio.create_task(_site_with_timeout(u, seen_jobs, browser, is_first_cycle)) for u in all_urls]
+
+def scrape_urls() -> list[str]:
+    """URLs this process scrapes: all of them, or a sharded worker's assigned share."""
+    return all_urls() if _shard_urls is None else _shard_urls
+
+# URLs already seeded (by a check, a recent checkpoint or another worker); any
+# other URL, e.g. a new one or one unchecked for RESUME_WINDOW, seeds on its first check
+_seeded_urls: set[str] = set()
+
+async def run_cycle(seen_jobs: SeenStore, pool: ContextPool):
+    urls = scrape_urls()
+    seeding = sum(u not in _seeded_urls for u in urls)
+    label = f" ({seeding} seeding the seen list, no alerts)" if seeding else ""
+    log(f"🚀 Cycle — {len(urls)} unique URLs, {MAX_CONCURRENT_CONTEXTS} concurrent contexts{label}…")
+    _cycle_stats["unchanged"] = 0
+    tasks   = [asyncio.create_task(_site_task(u, seen_jobs, pool, u not in _seeded_urls)) for u in urls]
     results = await asyncio.gather(*tasks, return_exceptions=True)
     total   = sum(r for r in results if isinstance(r, int))
-    log(f"✅ Cycle done — {total} new job(s) total.")
+    seen_jobs.flush()
+    _seeded_urls.update(u for u in urls if _scrape_ok.get(u))
+    log(f"✅ Cycle done — {total} new job(s) total, "
+        f"{_cycle_stats['unchanged']}/{len(urls)} URL(s) unchanged (short-circuited).")
+
+# ================= ADAPTIVE SCHEDULER ================= #
+class AdaptiveScheduler:
+    """
+    Every URL on its own timer instead of a global gather-then-sleep cycle.
+
+    Per URL it keeps an EWMA of new jobs/hour, an EWMA of the error rate and
+    a 24-slot EWMA of new jobs/hour by hour of day. Activity is the mean of
+    the overall and current-hour rates; intervals are CHECK_INTERVAL scaled by
+    mean(√activity) / √activity, so busy feeds are polled more often and quiet
+    ones less, with the total poll rate staying at one per URL per
+    CHECK_INTERVAL. Failing URLs back off, everything is clamped to
+    [POLL_MIN_INTERVAL, POLL_MAX_INTERVAL], and at most MAX_CONCURRENT_SCRAPES
+    run at once. A URL's first poll seeds the seen store without alerting.
+    """
+
+    ALPHA = 0.2   # EWMA weight of the newest observation
+
+    def __init__(self, seen_jobs: SeenStore, urls: list[str]):
+        self.seen_jobs = seen_jobs
+        self.state: dict[str, dict] = {}
+        self._budget = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+        self._tick = {"polls": 0, "new": 0}
+        self.set_urls(urls)
+
+    def set_urls(self, urls: list[str]):
+        now = time.time()
+        for i, url in enumerate(urls):
+            # Spread first polls over a few seconds rather than a thundering herd
+            self.state.setdefault(url, {
+                "rate": 0.0, "errors": 0.0, "hourly": [0.0] * 24,
+                "interval": CHECK_INTERVAL, "next_due": now + i * 0.5,
+                "last_run": None, "seeded": url in _seeded_urls, "running": False,
+            })
+        for url in set(self.state) - set(urls):
+            del self.state[url]
+
+    def _activity(self, st: dict, hour: int) -> float:
+        return 0.5 * (st["rate"] + st["hourly"][hour]) + 0.05   # floor keeps quiet URLs alive
+
+    def _reschedule(self, now: float):
+        hour = datetime.now().hour
+        weights = {u: self._activity(st, hour) ** 0.5 for u, st in self.state.items()}
+        mean_w = sum(weights.values()) / max(len(weights), 1)
+        for url, st in self.state.items():
+            interval = CHECK_INTERVAL * mean_w / weights[url] * (1 + 2 * st["errors"])
+            st["interval"] = min(POLL_MAX_INTERVAL, max(POLL_MIN_INTERVAL, interval))
+            if st["last_run"] is not None and not st["running"]:
+                st["next_due"] = st["last_run"] + st["interval"]
+
+    def _record(self, url: str, new_jobs: int, ok: bool, started: float):
+        st = self.state.get(url)
+        if st is None:
+            return
+        a = self.ALPHA
+        if st["seeded"] and st["last_run"] is not None:
+            hours = max(started - st["last_run"], 1.0) / 3600
+            per_hour = new_jobs / hours
+            st["rate"] = (1 - a) * st["rate"] + a * per_hour
+            h = datetime.fromtimestamp(started).hour
+            st["hourly"][h] = (1 - a) * st["hourly"][h] + a * per_hour
+        st["errors"] = (1 - a) * st["errors"] + a * (0.0 if ok else 1.0)
+        st["seeded"] = st["seeded"] or ok
+        if st["seeded"]:
+            _seeded_urls.add(url)
+        st["last_run"] = started
+        st["running"] = False
+        self._tick["polls"] += 1
+        self._tick["new"] += new_jobs
+
+    async def _poll(self, url: str, pool: ContextPool):
+        st = self.state[url]
+        started = time.time()
+        new_jobs = 0
+        try:
+            new_jobs = await check_site(url, self.seen_jobs, pool, is_first_cycle=not st["seeded"])
+        except Exception as e:
+            log(f"⚠️  Task error for {url[:60]}: {e}")
+            _scrape_ok[url] = False
+        finally:
+            self._budget.release()
+            self._record(url, new_jobs, _scrape_ok.get(url, False), started)
+            self._reschedule(time.time())
+
+    def _report(self):
+        self.seen_jobs.flush()
+        busiest = sorted(self.state.items(), key=lambda kv: kv[1]["interval"])[:3]
+        log(f"📊 Last {CHECK_INTERVAL}s — {self._tick['polls']} poll(s), {self._tick['new']} new job(s), "
+            f"{_cycle_stats['unchanged']} short-circuited. Fastest: "
+            + ", ".join(f"{u[8:40]}… {st['interval']:.0f}s" for u, st in busiest))
+        self._tick = {"polls": 0, "new": 0}
+        _cycle_stats["unchanged"] = 0
+
+    async def run(self, pool: ContextPool, duration: float, stop: asyncio.Event | None = None):
+        """Poll URLs as they fall due for `duration` seconds (or until `stop` is set), then drain in-flight scrapes."""
+        deadline = time.time() + duration
+        next_report = time.time() + CHECK_INTERVAL
+        tasks: set = set()
+        try:
+            while time.time() < deadline and not (stop and stop.is_set()):
+                now = time.time()
+                if now >= next_report:
+                    self._report()
+                    next_report = now + CHECK_INTERVAL
+                idle = [(st["next_due"], u) for u, st in self.state.items() if not st["running"]]
+                due_at, url = min(idle) if idle else (now + 1, None)
+                if url is None or due_at > now:
+                    await asyncio.sleep(min(max(due_at - now, 0.05), next_report - now, deadline - now, 5))
+                    continue
+                await self._budget.acquire()
+                st = self.state.get(url)
+                if st is None or st["running"]:
+                    self._budget.release()
+                    continue
+                st["running"] = True
+                task = asyncio.create_task(self._poll(url, pool))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            if tasks:
+                log(f"⏳ Waiting for {len(tasks)} in-flight scrape(s)…")
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self.seen_jobs.flush()
+
+# ================= SHARDING ================= #
+SHARD_HEARTBEAT      = 5    # seconds between worker heartbeats and coordinator rebalances
+SHARD_WORKER_TIMEOUT = 30   # a worker silent this long is presumed dead; its URLs move on
+SHARD_OUTBOX_POLL    = 1    # coordinator: seconds between checks for alerts queued by workers
+
+_shard_urls: list[str] | None = None   # set in worker mode: this process's share of all_urls()
+
+def _hrw(worker: str, url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{worker}|{url}".encode(), digest_size=8).digest(), "big")
+
+class ShardBoard:
+    """
+    Worker registry and URL assignments in the shared database, for running
+    scrapers as several processes (each with its own browser) next to one
+    coordinator that owns delivery. Workers heartbeat; the coordinator spreads
+    all_urls() over the live ones by rendezvous hashing, so a worker joining
+    or dying only moves that worker's share. Whether a URL has been seeded is
+    kept per URL, so a worker taking one over alerts on it straight away.
+    """
+
+    def __init__(self, path: str = SEEN_DB_PATH):
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS shard_workers ("
+            " name TEXT PRIMARY KEY, host TEXT, pid INTEGER, started REAL NOT NULL, heartbeat REAL NOT NULL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS shard_urls ("
+            " url TEXT PRIMARY KEY, worker TEXT, seeded INTEGER NOT NULL DEFAULT 0)")
+
+    def heartbeat(self, name: str):
+        now = time.time()
+        self._db.execute(
+            "INSERT INTO shard_workers (name, host, pid, started, heartbeat) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (name) DO UPDATE SET host = excluded.host, pid = excluded.pid,"
+            " heartbeat = excluded.heartbeat", (name, socket.gethostname(), os.getpid(), now, now))
+
+    def leave(self, name: str):
+        self._db.execute("DELETE FROM shard_workers WHERE name = ?", (name,))
+
+    def live_workers(self, now: float | None = None) -> list[str]:
+        cutoff = (now or time.time()) - SHARD_WORKER_TIMEOUT
+        return [r[0] for r in self._db.execute(
+            "SELECT name FROM shard_workers WHERE heartbeat >= ? ORDER BY name", (cutoff,))]
+
+    def assign(self, urls: list[str], workers: list[str]) -> int:
+        """Spread `urls` over `workers`; returns how many URLs changed hands (new ones included)."""
+        current = dict(self._db.execute("SELECT url, worker FROM shard_urls"))
+        want = {u: max(workers, key=lambda w: _hrw(w, u)) if workers else None for u in urls}
+        changed = [(u, w) for u, w in want.items() if u not in current or current[u] != w]
+        gone = [(u,) for u in current if u not in want]
+        if not changed and not gone:
+            return 0
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany(
+                "INSERT INTO shard_urls (url, worker) VALUES (?, ?)"
+                " ON CONFLICT (url) DO UPDATE SET worker = excluded.worker", changed)
+            self._db.executemany("DELETE FROM shard_urls WHERE url = ?", gone)
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return len(changed)
+
+    def assigned(self, name: str) -> dict[str, bool]:
+        """This worker's URLs → whether each has been seeded."""
+        return {u: bool(s) for u, s in self._db.execute(
+            "SELECT url, seeded FROM shard_urls WHERE worker = ? ORDER BY url", (name,))}
+
+    def mark_seeded(self, urls):
+        self._db.executemany("UPDATE shard_urls SET seeded = 1 WHERE url = ?", [(u,) for u in urls])
+
+    def close(self):
+        self._db.close()
+
+async def coordinate(board: ShardBoard):
+    """Coordinator loop: keep all_urls() spread over the live workers."""
+    known: set[str] = set()
+    while True:
+        try:
+            workers = board.live_workers()
+            for name in sorted(set(workers) - known):
+                log(f"🤝 Worker {name} joined.")
+            for name in sorted(known - set(workers)):
+                log(f"💀 Worker {name} lost (no heartbeat for {SHARD_WORKER_TIMEOUT}s).")
+            known = set(workers)
+            moved = board.assign(all_urls(), workers)
+            if moved:
+                if workers:
+                    log(f"⚖️  Assigned {moved} URL(s); {len(all_urls())} across {len(workers)} worker(s).")
+                else:
+                    log("⚖️  No live workers — URLs unassigned until one joins.")
+        except Exception as e:
+            log(f"⚠️  Coordinator error: {e}")
+        await asyncio.sleep(SHARD_HEARTBEAT)
+
+async def join_shard(board: ShardBoard, name: str):
+    """Register as a worker and wait for the coordinator to hand over some URLs."""
+    global _shard_urls
+    waiting = False
+    while True:
+        board.heartbeat(name)
+        mine = board.assigned(name)
+        if mine:
+            _seeded_urls.update(u for u, seeded in mine.items() if seeded)
+            _shard_urls = list(mine)
+            log(f"   Worker {name}: {len(mine)} URL(s) assigned.")
+            return
+        if not waiting:
+            log(f"   Worker {name}: waiting for the coordinator to assign URLs…")
+            waiting = True
+        await asyncio.sleep(SHARD_HEARTBEAT)
+
+async def shard_heartbeat(board: ShardBoard, name: str, seen_jobs: SeenStore,
+                          scheduler: "AdaptiveScheduler | None"):
+    """Worker loop: heartbeat, follow reassignments and report which URLs are seeded."""
+    global _shard_urls
+    pruned = time.time()
+    while True:
+        await asyncio.sleep(SHARD_HEARTBEAT)
+        try:
+            board.heartbeat(name)
+            mine = board.assigned(name)
+            board.mark_seeded(u for u, seeded in mine.items() if not seeded and u in _seeded_urls)
+            _seeded_urls.update(u for u, seeded in mine.items() if seeded)
+            if set(mine) != set(_shard_urls):
+                added, dropped = set(mine) - set(_shard_urls), set(_shard_urls) - set(mine)
+                log(f"⚖️  Worker {name}: now {len(mine)} URL(s) (+{len(added)} / -{len(dropped)}).")
+                _shard_urls = list(mine)
+                if scheduler:
+                    scheduler.set_urls(_shard_urls)
+            seen_jobs.reload_bloom()
+            if time.time() - pruned >= SEEN_EVICT_INTERVAL:
+                seen_jobs.dupes.prune()   # bounds this process's index; the table DELETE just repeats the coordinator's
+                pruned = time.time()
+        except Exception as e:
+            log(f"⚠️  Worker heartbeat error: {e}")
 
 # ================= ENTRY POINT ================= #
-async def main():
-    global _ctx_sem
+async def replay(directory: str, speed: float = 0.0):
+    """
+    Rerun recorded checks from `directory` through check_site with no browser
+    or network, delivering to a local stand-in server. speed=0 runs as fast
+    as possible (EARLY_DELAY and send pacing dropped); otherwise recorded
+    time is compressed by `speed` (1 = recorded pace), and so are EARLY_DELAY
+    and the send rate limits. Ends with throughput and time-to-alert figures.
+    """
+    global _ctx_sem, _http_sem, _outbox, _replayer, _limiter, EARLY_DELAY
+    global TELEGRAM_API_BASE, WHOP_API_BASE, TG_CHAT_RATE, TG_GROUP_RATE, TG_GLOBAL_RATE
+    global EARLY_CHAT_RATE, WHOP_CHANNEL_RATE, WHOP_GLOBAL_RATE
+
+    _replayer = Replayer(directory)
+    if not _replayer.checks:
+        log(f"Nothing recorded in {directory}.")
+        return
+    _ctx_sem  = asyncio.Semaphore(MAX_CONCURRENT_CONTEXTS)
+    _http_sem = asyncio.Semaphore(MAX_CONCURRENT_HTTP)
+
+    factor = speed or 1e6
+    EARLY_DELAY = EARLY_DELAY / speed if speed else 0
+    (TG_CHAT_RATE, TG_GROUP_RATE, TG_GLOBAL_RATE, EARLY_CHAT_RATE,
+     WHOP_CHANNEL_RATE, WHOP_GLOBAL_RATE) = (
+        (rate * factor, burst) for rate, burst in
+        (TG_CHAT_RATE, TG_GROUP_RATE, TG_GLOBAL_RATE, EARLY_CHAT_RATE, WHOP_CHANNEL_RATE, WHOP_GLOBAL_RATE))
+    _limiter = make_limiter()
+
+    runner, base_url, received = await start_standin_server(os.path.join(directory, "deliveries.jsonl"))
+    TELEGRAM_API_BASE = WHOP_API_BASE = base_url
+    seen_jobs = SeenStore(":memory:", bloom_bits=0)
+    _outbox = Outbox(":memory:")
+    dispatcher = asyncio.create_task(outbox_dispatcher(_outbox))
+    log(f"▶️  Replaying {len(_replayer.checks)} checks from {directory} "
+        f"({'as fast as possible' if not speed else f'{speed:g}× recorded pace'})…")
+
+    t0, rec_t0 = time.perf_counter(), _replayer.checks[0][0]
+    seeded: set[str] = set()
+    new_jobs = 0
+    try:
+        for ts, url in _replayer.checks:
+            if speed:
+                await asyncio.sleep(max(0.0, (ts - rec_t0) / speed - (time.perf_counter() - t0)))
+            new_jobs += await check_site(url, seen_jobs, None, is_first_cycle=url not in seeded)
+            seeded.add(url)
+            seen_jobs.flush()
+        scraped = time.perf_counter() - t0
+        while _outbox.outstanding():
+            await asyncio.sleep(0.05)
+        total = time.perf_counter() - t0
+    finally:
+        dispatcher.cancel()
+        await close_delivery()
+        await close_http()
+        await runner.cleanup()
+
+    candidates = sum(CANDIDATES.values.values())
+    log(f"⏹️  {len(_replayer.checks)} checks, {candidates:.0f} candidates, {new_jobs} new jobs in "
+        f"{scraped:.2f}s ({len(_replayer.checks) / scraped:.1f} checks/s, {candidates / scraped:.0f} candidates/s); "
+        f"{len(received)} messages delivered, all sent after {total:.2f}s.")
+    for group, label, n, stage, p50, p90, p99 in _outbox.latency_report(0):
+        if stage != "published":   # recorded publication dates say nothing about replay speed
+            log(f"   {group:<11} {label:<28} {stage:<10} n={n:<5} {p50:>8.3f} {p90:>8.3f} {p99:>8.3f}")
+    _outbox.close()
+    seen_jobs.close()
+
+async def main(record_dir: str | None = None, role: str = "single", worker_name: str | None = None):
+    """
+    role "single" scrapes and delivers in this process. For sharding, one
+    "coordinator" delivers and assigns URLs, and any number of "worker"
+    processes (sharing SEEN_DB_PATH) scrape their share into the outbox.
+    """
+    global _ctx_sem, _http_sem, _outbox, _recorder, _watchdog, _enricher
+    started = time.perf_counter()
 
     try:
         soft, hard = resource.getrlimit(resource.RLIMIT_NPROC)
@@ -1021,41 +3308,146 @@ async def main():
     except Exception as e:
         log(f"   Could not raise RLIMIT_NPROC: {e}")
 
-    _ctx_sem = asyncio.Semaphore(MAX_CONCURRENT_CONTEXTS)
+    _ctx_sem  = asyncio.Semaphore(MAX_CONCURRENT_CONTEXTS)
+    _http_sem = asyncio.Semaphore(MAX_CONCURRENT_HTTP)
 
-    log("🚀 NHS JOB BOT STARTED")
+    log("🚀 NHS JOB BOT STARTED" + {"single": "", "coordinator": " (coordinator)",
+                                     "worker": f" (worker {worker_name})"}[role])
     log(f"   Early-alert chat : {EARLY_CHAT_ID}  (immediate)")
     log(f"   Group chat       : {CHAT_ID}  (+{EARLY_DELAY}s delay)")
     log(f"   Specialty Whop channels : {len(SPECIALTY_CHANNELS)}")
+    log(f"   Filter config    : {FILTERS_PATH}  (reloads on change or SIGHUP)")
+
+    if record_dir:
+        _recorder = Recorder(record_dir)
+        log(f"   Recording fetched listings to {_recorder.path}")
+
+    playwright = launching = None
+    if role != "coordinator":
+        # Chromium takes a while to come up; start it while the stores load
+        log("🌐 Launching shared browser…")
+        playwright = await async_playwright().start()
+        launching  = asyncio.create_task(launch_browser(playwright))
 
-    seen_jobs = load_seen()
+    seen_jobs = await asyncio.to_thread(load_seen, role == "worker")
     log(f"   Loaded {len(seen_jobs)} previously seen job IDs.")
-    asyncio.create_task(telegram_consumer())
+    if role != "coordinator":
+        ages = restore_checkpoints(seen_jobs)
+        if ages:
+            log(f"   Warm start: {len(ages)} URL(s) resume from checkpoints (oldest "
+                f"{max(ages.values()) / 60:.0f} min ago) and alert on anything new; "
+                f"{len(set(all_urls()) - set(ages))} seed first.")
+    _outbox = Outbox(SEEN_DB_PATH)
+    if role != "worker":
+        # Workers only queue alerts; delivery and housekeeping stay in one process
+        replayed = _outbox.recover()
+        if replayed:
+            log(f"   Replaying {replayed} undelivered alert(s) from the outbox.")
+        if role == "coordinator":
+            _outbox.poll = SHARD_OUTBOX_POLL
+        asyncio.create_task(outbox_dispatcher(_outbox))
+        asyncio.create_task(latency_reporter(_outbox))
+        asyncio.create_task(seen_evictor(seen_jobs))
+    if role != "coordinator":
+        _enricher = DetailEnricher(_outbox)
+    if METRICS_PORT:
+        await start_metrics_server()
 
     cycle = 0
-    async with async_playwright() as playwright:
+    board = ShardBoard(SEEN_DB_PATH) if role != "single" else None
+    try:
+        if role == "coordinator":
+            asyncio.create_task(filter_config_watcher())
+            await coordinate(board)
+            return
+        if role == "worker":
+            await join_shard(board, worker_name)
+        scheduler = AdaptiveScheduler(seen_jobs, scrape_urls()) if SCHEDULER == "adaptive" else None
+        asyncio.create_task(filter_config_watcher(scheduler.set_urls if scheduler and role == "single" else None))
+        if role == "worker":
+            asyncio.create_task(shard_heartbeat(board, worker_name, seen_jobs, scheduler))
         while True:
-            log("🌐 Launching shared browser…")
-            browser = await launch_browser(playwright)
             try:
-                for _ in range(PLAYWRIGHT_RECYCLE_EVERY):
-                    cycle += 1
-                    log(f"─── CYCLE {cycle} ───────────────────────────────")
-                    try:
-                        await run_cycle(seen_jobs, browser, is_first_cycle=(cycle == 1))
-                    except Exception as e:
-                        log(f"🔥 Cycle-level error (will continue): {e}")
-                    log(f"💤 Sleeping {CHECK_INTERVAL}s …\n")
-                    await asyncio.sleep(CHECK_INTERVAL)
+                if launching is None:
+                    log("🌐 Launching shared browser…")
+                    launching = asyncio.create_task(launch_browser(playwright))
+                browser = await launching
+            except Exception as e:
+                log(f"🔥 Browser launch failed ({e}) — retrying in 30s.")
+                await asyncio.sleep(30)
+                continue
             finally:
-                log(f"♻️  Closing browser after {PLAYWRIGHT_RECYCLE_EVERY} cycles…")
-                try:
-                    await browser.close()
-                except Exception:
-                    pass
-                gc.collect()
-                await asyncio.sleep(5)
+                launching = None
+            if started is not None:
+                log(f"   Browser up {time.perf_counter() - started:.1f}s after start.")
+                started = None
+            pool     = ContextPool(browser)
+            watchdog = _watchdog = BrowserWatchdog(browser)
+            asyncio.create_task(pool.prewarm(scrape_urls()))
+            try:
+                if scheduler:
+                    log(f"⏱️  Adaptive per-URL polling ({POLL_MIN_INTERVAL}–{POLL_MAX_INTERVAL}s, "
+                        f"{MAX_CONCURRENT_SCRAPES} concurrent scrapes)…")
+                    await scheduler.run(pool, duration=PLAYWRIGHT_RECYCLE_EVERY * CHECK_INTERVAL,
+                                        stop=watchdog.tripped)
+                else:
+                    for _ in range(PLAYWRIGHT_RECYCLE_EVERY):
+                        cycle += 1
+                        log(f"─── CYCLE {cycle} ───────────────────────────────")
+                        try:
+                            await run_cycle(seen_jobs, pool)
+                        except Exception as e:
+                            log(f"🔥 Cycle-level error (will continue): {e}")
+                        log(f"💤 Sleeping {CHECK_INTERVAL}s …\n")
+                        try:
+                            await asyncio.wait_for(watchdog.tripped.wait(), CHECK_INTERVAL)
+                            break   # recycle between cycles rather than after the next one
+                        except asyncio.TimeoutError:
+                            pass
+            finally:
+                await recycle_browser(browser, pool, watchdog)
+            if watchdog.trigger == "python_memory":
+                # A fresh browser would trip again on its first sample; restart the whole process
+                log("🐕 Exiting so the supervisor restarts the bot with a fresh Python heap.")
+                raise SystemExit(75)   # EX_TEMPFAIL
+    finally:
+        if board is not None:
+            if role == "worker":
+                board.leave(worker_name)   # hand our URLs over now rather than after the timeout
+            board.close()
+        if _enricher is not None:
+            await _enricher.close()
+        await close_delivery()
+        await close_http()
+        _outbox.close()
+        seen_jobs.close()
+        if _recorder is not None:
+            _recorder.close()
+        if launching is not None:
+            launching.cancel()
+        if playwright is not None:
+            await playwright.stop()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    import argparse
+    ap = argparse.ArgumentParser(description="NHS job alert bot")
+    ap.add_argument("--record", metavar="DIR", help="save every fetched listing to DIR/listings.jsonl")
+    ap.add_argument("--replay", metavar="DIR", help="rerun DIR's recordings offline against a stand-in API")
+    ap.add_argument("--speed", type=float, default=0.0,
+                    help="replay pace: 0 = as fast as possible (default), 1 = recorded pace, N = N× faster")
+    role = ap.add_mutually_exclusive_group()
+    role.add_argument("--coordinator", action="store_true",
+                      help="deliver alerts and assign URLs to --worker processes; no scraping here")
+    role.add_argument("--worker", metavar="NAME", nargs="?", const="",
+                      help="scrape the URLs the coordinator assigns (NAME defaults to host-pid)")
+    args = ap.parse_args()
+    if args.replay:
+        asyncio.run(replay(args.replay, args.speed))
+    elif args.coordinator:
+        asyncio.run(main(record_dir=args.record, role="coordinator"))
+    elif args.worker is not None:
+        name = args.worker or f"{socket.gethostname()}-{os.getpid()}"
+        asyncio.run(main(record_dir=args.record, role="worker", worker_name=name))
+    else:
+        asyncio.run(main(record_dir=args.record))